@@ -1,6 +1,45 @@
+import hashlib
+import os
+import pickle
 import pandas as pd
 from collections import defaultdict
-from backend import solve_schedule  # Ensure your backend.py implements solve_schedule
+from typing import Dict, List, Optional
+from backend import ScheduleSession, solve_schedule  # Ensure your backend.py implements solve_schedule
+from name_index import NameIndex
+
+SCHEDULE_CACHE_VERSION = 2
+
+# Optional sheet columns copied onto each session, by session field.
+SECTION_SIZE_COLUMNS = {'Capacity': 'capacity', 'Enrolled': 'enrolled'}
+
+def parse_schedule_frame(df: pd.DataFrame) -> dict:
+    """
+    Vectorized parse of the schedule sheet (see parse_excel_single_sheet) into
+    "courses" and "teachers", in sheet row order.
+    """
+    required_columns = ['Course Name', 'Class Code', 'Day', 'Time', 'Teacher']
+    df = df.dropna(subset=required_columns)
+    names = df['Course Name'].astype(str).str.strip()
+    teacher_names = df['Teacher'].astype(str).str.strip()
+    time_slots = df['Day'].astype(str) + ' ' + df['Time'].astype(str)
+    course_ids = names + '_' + df['Class Code'].astype(str).str.strip()
+    courses = [
+        {"id": course_id, "name": name, "preferred_teacher": teacher, "time_slot": time_slot}
+        for course_id, name, teacher, time_slot in zip(course_ids, names, teacher_names, time_slots)
+    ]
+    # Optional section size columns: seats ('Capacity') and students ('Enrolled').
+    for column, field in SECTION_SIZE_COLUMNS.items():
+        if column in df.columns:
+            for course, value in zip(courses, pd.to_numeric(df[column], errors='coerce')):
+                if pd.notna(value):
+                    course[field] = int(value)
+    
+    # Each teacher is available in the slots they teach; teachers keep first-appearance order.
+    pairs = pd.DataFrame({'teacher': teacher_names, 'slot': time_slots})
+    pairs = pairs[pairs['teacher'] != '']
+    slots = pairs.drop_duplicates().groupby('teacher', sort=False)['slot'].agg(list)
+    teachers = [{"id": name, "name": name, "available_slots": teacher_slots} for name, teacher_slots in slots.items()]
+    return {"courses": courses, "teachers": teachers}
 
 def parse_excel_single_sheet(file_path: str) -> dict:
     """
@@ -11,53 +50,175 @@ def parse_excel_single_sheet(file_path: str) -> dict:
       - 'Day'
       - 'Time'
       - 'Teacher'
+    and optionally 'Capacity' (seats) and 'Enrolled' (students) per section.
     
     Each row represents one course session.
     Returns a dictionary with "courses" and "teachers".
     The course id is constructed as "Course Name_Class Code".
     Skips rows with any missing essential data.
     """
-    df = pd.read_excel(file_path, engine='openpyxl')
-    courses = []
-    teachers_dict = {}
-    required_columns = ['Course Name', 'Class Code', 'Day', 'Time', 'Teacher']
-    
-    for _, row in df.iterrows():
-        if any(pd.isna(row[col]) for col in required_columns):
-            continue
-        
-        time_slot = f"{row['Day']} {row['Time']}"
-        course_id = f"{str(row['Course Name']).strip()}_{str(row['Class Code']).strip()}"
-        course = {
-            "id": course_id,
-            "name": str(row["Course Name"]).strip(),
-            "preferred_teacher": str(row["Teacher"]).strip(),  # default from Excel
-            "time_slot": time_slot
-        }
-        courses.append(course)
-        
-        teacher_name = str(row["Teacher"]).strip()
-        if teacher_name:
-            if teacher_name not in teachers_dict:
-                teachers_dict[teacher_name] = {
-                    "id": teacher_name,
-                    "name": teacher_name,
-                    "available_slots": set()
-                }
-            teachers_dict[teacher_name]["available_slots"].add(time_slot)
-    
-    teachers = []
-    for teacher_data in teachers_dict.values():
-        teacher_data["available_slots"] = list(teacher_data["available_slots"])
-        teachers.append(teacher_data)
-    
-    return {"courses": courses, "teachers": teachers}
+    return parse_schedule_frame(pd.read_excel(file_path, engine='openpyxl'))
+
+def file_hash(file_path: str) -> str:
+    """SHA-1 of a file's bytes."""
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ParsedSchedule:
+    """
+    The parsed schedule ("courses" and "teachers", as parse_excel_single_sheet returns)
+    with prebuilt indexes for O(1) lookups:
+      - sessions_by_name: lowercased course name -> its sessions
+      - teacher_slots: teacher name -> set of time slots they are available in
+      - course_groups: course id -> indices of its sessions in courses
+      - course_index, teacher_index: typo-tolerant NameIndex lookups of course and teacher names
+    """
+
+    def __init__(self, courses: List[Dict], teachers: List[Dict]):
+        self.courses = courses
+        self.teachers = teachers
+        self.sessions_by_name: Dict[str, List[Dict]] = {}
+        self.course_groups: Dict[str, List[int]] = {}
+        for i, course in enumerate(courses):
+            self.sessions_by_name.setdefault(course["name"].strip().lower(), []).append(course)
+            self.course_groups.setdefault(course["id"], []).append(i)
+        self.teacher_slots = {teacher["name"]: set(teacher["available_slots"]) for teacher in teachers}
+        self.course_index = NameIndex(self.course_names())
+        self.teacher_index = NameIndex(teacher["name"] for teacher in teachers)
+
+    @property
+    def data(self) -> dict:
+        return {"courses": self.courses, "teachers": self.teachers}
+
+    def course_names(self) -> List[str]:
+        """Sorted unique course names."""
+        return sorted(set(sessions[0]["name"].strip() for sessions in self.sessions_by_name.values()
+                          if sessions[0]["name"]))
+
+    def sessions_for(self, course_name: str) -> List[Dict]:
+        return self.sessions_by_name.get(course_name.strip().lower(), [])
+
+    def match_course(self, course_name: str) -> Optional[str]:
+        """The schedule's spelling of a course name, tolerating case, titles, spacing and small typos."""
+        sessions = self.sessions_for(course_name)
+        if sessions:
+            return sessions[0]["name"].strip()
+        return self.course_index.best(course_name)
+
+    def match_teacher(self, teacher_name: str) -> Optional[str]:
+        """The schedule's spelling of a teacher name (see match_course), or None."""
+        if teacher_name in self.teacher_slots:
+            return teacher_name
+        return self.teacher_index.best(teacher_name)
+
+    def resolve_preferences(self, selected_courses: Dict[str, Optional[str]]) -> Dict[str, Optional[str]]:
+        """
+        Maps user-typed course and teacher names onto the schedule's names (lowercased
+        course -> teacher). Names with no close match are kept as typed.
+        """
+        resolved = {}
+        for name, teacher in selected_courses.items():
+            course = self.match_course(name) or name
+            if teacher:
+                teacher = self.match_teacher(teacher.strip()) or teacher
+            resolved[course.strip().lower()] = teacher
+        return resolved
+
+    def teacher_options(self, course_name: str) -> List[str]:
+        """Teachers recorded for a course's sessions."""
+        return sorted(set(c["preferred_teacher"] for c in self.sessions_for(course_name)))
+
+    def filter_courses(self, selected_courses: Dict[str, Optional[str]]) -> dict:
+        """
+        Sessions of the selected courses (lowercased name -> preferred teacher), as copies
+        carrying the user's teacher so the shared schedule is left untouched.
+        """
+        courses = []
+        for name, teacher in selected_courses.items():
+            courses.extend(dict(c, preferred_teacher=teacher.strip()) if teacher else c for c in self.sessions_for(name))
+        return {"courses": courses, "teachers": self.teachers}
+
+def load_schedule(file_path: str, cache_path: Optional[str] = None) -> ParsedSchedule:
+    """
+    Loads the parsed schedule from a pickle cache next to the workbook, parsing the
+    Excel file only when the cache is missing or stale. The cache is trusted while the
+    workbook's mtime and size are unchanged; otherwise its SHA-1 is compared, so a
+    touched but unchanged file does not trigger a re-parse.
+    """
+    cache_path = cache_path or file_path + '.schedule.pkl'
+    stat = os.stat(file_path)
+    cached = None
+    try:
+        with open(cache_path, 'rb') as f:
+            cached = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        pass
+    if cached is not None and cached.get('version') == SCHEDULE_CACHE_VERSION:
+        if (cached['mtime'], cached['size']) == (stat.st_mtime, stat.st_size):
+            return ParsedSchedule(cached['courses'], cached['teachers'])
+        source_hash = file_hash(file_path)
+        if cached['hash'] == source_hash:
+            cached.update(mtime=stat.st_mtime, size=stat.st_size)
+            write_schedule_cache(cache_path, cached)
+            return ParsedSchedule(cached['courses'], cached['teachers'])
+    else:
+        source_hash = file_hash(file_path)
+    data = parse_excel_single_sheet(file_path)
+    write_schedule_cache(cache_path, {'version': SCHEDULE_CACHE_VERSION, 'mtime': stat.st_mtime,
+                                      'size': stat.st_size, 'hash': source_hash, **data})
+    return ParsedSchedule(data['courses'], data['teachers'])
+
+def write_schedule_cache(cache_path: str, payload: dict):
+    # Write to a temporary file first so a reader never sees a half-written cache.
+    with open(cache_path + '.tmp', 'wb') as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(cache_path + '.tmp', cache_path)
 
 def get_unique_course_names(data: dict) -> list:
     """Returns a sorted list of unique course names from the parsed data."""
     unique = set(course["name"].strip() for course in data["courses"] if course["name"])
     return sorted(unique)
 
+def prompt_teacher_for_course(course_name: str, schedule: ParsedSchedule) -> str:
+    """
+    Lists the teachers recorded for a course's sessions and lets the user pick one
+    or enter one manually. Returns the chosen teacher name.
+    """
+    # Sessions for the selected course (indexed by lowercased name)
+    rep_courses = schedule.sessions_for(course_name)
+    if rep_courses:
+        # Instead of checking the teacher's available_slots (global),
+        # use only the default teachers that appear for sessions of this course.
+        teacher_options = schedule.teacher_options(course_name)
+        if teacher_options:
+            print(f"Available teachers for '{course_name}':")
+            for idx, t in enumerate(teacher_options):
+                print(f"{idx+1}. {t}")
+            try:
+                t_choice = int(input("Select a teacher by number (or 0 to enter manually): "))
+            except ValueError:
+                t_choice = 0
+            if t_choice == 0 or not (1 <= t_choice <= len(teacher_options)):
+                teacher_choice = match_entered_teacher(input("Enter your preferred teacher: ").strip(), schedule)
+            else:
+                teacher_choice = teacher_options[t_choice - 1]
+        else:
+            teacher_choice = match_entered_teacher(input(f"Enter the preferred teacher for '{course_name}': ").strip(), schedule)
+    else:
+        teacher_choice = match_entered_teacher(input(f"Enter the preferred teacher for '{course_name}': ").strip(), schedule)
+    return teacher_choice
+
+def match_entered_teacher(teacher_name: str, schedule: ParsedSchedule) -> str:
+    """Replaces a typed teacher name with the closest teacher in the schedule, if any."""
+    matched = schedule.match_teacher(teacher_name) if teacher_name else None
+    if matched and matched != teacher_name:
+        print(f"Using '{matched}' for '{teacher_name}'.")
+        return matched
+    return teacher_name
+
 def prompt_course_selection(available_courses: list) -> dict:
     """
     Displays available courses and lets the user select which courses they want to take.
@@ -89,52 +250,18 @@ def prompt_course_selection(available_courses: list) -> dict:
                 print("Invalid input. Please enter a valid number.")
         course_name = available_courses[selection - 1]
         
-        # Filter sessions for the selected course (match by name, case-insensitive)
-        rep_courses = [c for c in raw_data["courses"] if c["name"].strip().lower() == course_name.lower()]
-        if rep_courses:
-            # Instead of checking the teacher's available_slots (global),
-            # use only the default teachers that appear for sessions of this course.
-            teacher_options = sorted(set(c["preferred_teacher"] for c in rep_courses))
-            if teacher_options:
-                print(f"Available teachers for '{course_name}':")
-                for idx, t in enumerate(teacher_options):
-                    print(f"{idx+1}. {t}")
-                try:
-                    t_choice = int(input("Select a teacher by number (or 0 to enter manually): "))
-                except ValueError:
-                    t_choice = 0
-                if t_choice == 0 or not (1 <= t_choice <= len(teacher_options)):
-                    teacher_choice = input("Enter your preferred teacher: ").strip()
-                else:
-                    teacher_choice = teacher_options[t_choice - 1]
-            else:
-                teacher_choice = input(f"Enter the preferred teacher for '{course_name}': ").strip()
-        else:
-            teacher_choice = input(f"Enter the preferred teacher for '{course_name}': ").strip()
+        teacher_choice = prompt_teacher_for_course(course_name, schedule)
         user_choices[course_name.lower()] = teacher_choice
     return user_choices
 
 
-def filter_user_courses(data: dict, selected_courses: dict) -> dict:
+def filter_user_courses(schedule: ParsedSchedule, selected_courses: dict) -> dict:
     """
-    Filters the parsed data to include only sessions for the courses the user selected.
-    Also updates each session's 'preferred_teacher' with the user-provided teacher.
+    Filters the parsed data to include only sessions for the courses the user selected,
+    with each session's 'preferred_teacher' set to the user-provided teacher. Course and
+    teacher names are matched fuzzily (see ParsedSchedule.resolve_preferences).
     """
-    filtered_courses = []
-    for c in data["courses"]:
-        if "98577" in c["id"] or "98568" in c["id"]:
-            print(f"{c['id']!r} -> Teacher: {c['preferred_teacher']!r}")
-
-    for course in data["courses"]:
-        if course["name"].strip().lower() in selected_courses:
-            if course["preferred_teacher"] in selected_courses[course["name"].strip().lower()]:
-                print(repr(course["time_slot"]))
-
-    for course in data["courses"]:
-        if course["name"].strip().lower() in selected_courses:
-            course["preferred_teacher"] = selected_courses[course["name"].strip().lower()]
-            filtered_courses.append(course)
-    return {"courses": filtered_courses, "teachers": data["teachers"]}
+    return schedule.filter_courses(schedule.resolve_preferences(selected_courses))
 
 def group_assignments_by_day(assignments: list) -> dict:
     """Groups assignment records by day, assuming the day is the first token in time_slot."""
@@ -187,17 +314,17 @@ if __name__ == "__main__":
 
 
     
-    # Step 1: Parse the raw Excel data.
-    raw_data = parse_excel_single_sheet(file_path)
+    # Step 1: Parse the raw Excel data (loaded from the parse cache unless the workbook changed).
+    schedule = load_schedule(file_path)
     
     # Step 2: Get a sorted list of unique available courses.
-    available_courses = get_unique_course_names(raw_data)
+    available_courses = schedule.course_names()
     
     # Step 3: Let the user select which courses they want to take and enter their preferred teacher.
     selected_preferences = prompt_course_selection(available_courses)
     
     # Step 4: Filter raw data to include only the selected courses and update with user preferences.
-    user_data = filter_user_courses(raw_data, selected_preferences)
+    user_data = filter_user_courses(schedule, selected_preferences)
     
     # Step 5: Run the scheduling backend.
     result = solve_schedule(user_data)
@@ -211,4 +338,38 @@ if __name__ == "__main__":
     
     # Step 8: Display detailed conflict information with explanations.
     display_conflicts(result.get('conflicts', []))
+    
+    # Step 9: What-if edits, re-solved incrementally from the previous schedule.
+    if result.get('feasible'):
+        # Seed the session with this solution (assignments follow user_data's course order)
+        # so the first edit is warm-started like the later ones.
+        session = ScheduleSession(user_data, hints={course['id']: assignment['teacher'] for course, assignment
+                                                    in zip(user_data['courses'], assignments)})
+        while True:
+            action = input("\nWhat-if: [c]hange teacher, [a]dd course, [r]emove course, or Enter to quit: ").strip().lower()
+            if not action:
+                break
+            course_name = input("Course name: ").strip()
+            course_name = schedule.match_course(course_name) or course_name
+            if action.startswith('c'):
+                if not session.set_preferred_teacher(course_name, prompt_teacher_for_course(course_name, schedule)):
+                    print(f"'{course_name}' is not in your schedule.")
+                    continue
+            elif action.startswith('a'):
+                teacher = prompt_teacher_for_course(course_name, schedule)
+                sessions = [dict(c, preferred_teacher=teacher) for c in schedule.sessions_for(course_name)]
+                if not sessions:
+                    print(f"No sessions found for '{course_name}'.")
+                    continue
+                session.add_courses(sessions)
+            elif action.startswith('r'):
+                if not session.remove_course(course_name):
+                    print(f"'{course_name}' is not in your schedule.")
+                    continue
+            else:
+                continue
+            result = session.solve()
+            display_schedule(group_assignments_by_day(result.get('assignments', [])))
+            display_conflicts(result.get('conflicts', []))
+            print(f"(re-solved in {result['timings']['model_build'] + result['timings']['solve']:.3f}s)")
 11
\ No newline at end of file
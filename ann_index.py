@@ -0,0 +1,337 @@
+import json
+import os
+import numpy as np
+from typing import Dict, Tuple, Type
+
+try:
+    import hnswlib
+except ImportError:  # optional: only needed for the 'hnsw' backend
+    hnswlib = None
+
+# Rows per block when assigning vectors to centroids, to bound temporary memory.
+ASSIGN_BLOCK_ROWS = 65536
+
+# Training sample per product-quantization codebook (256 codewords each).
+PQ_MAX_TRAIN = 16384
+
+
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """
+    Returns the column indices of the top_k scores of each row, best first.
+    Uses argpartition so only the k winners are sorted.
+    """
+    k = min(top_k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1)
+    return np.take_along_axis(part, order, axis=1)
+
+
+def _pad_results(indices: np.ndarray, scores: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Pads a single query's results to top_k with -1 / -inf when too few candidates were found."""
+    missing = top_k - len(indices)
+    if missing > 0:
+        indices = np.concatenate([indices, np.full(missing, -1, dtype=np.int64)])
+        scores = np.concatenate([scores, np.full(missing, -np.inf, dtype=np.float32)])
+    return indices, scores
+
+
+def _nearest_centroids(vectors: np.ndarray, centroids: np.ndarray, metric: str) -> np.ndarray:
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    centroid_norms = (centroids ** 2).sum(axis=1)
+    for start in range(0, len(vectors), ASSIGN_BLOCK_ROWS):
+        block = np.asarray(vectors[start:start + ASSIGN_BLOCK_ROWS], dtype=np.float32)
+        if metric == 'ip':
+            assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        else:
+            assignments[start:start + len(block)] = np.argmin(centroid_norms - 2 * block @ centroids.T, axis=1)
+    return assignments
+
+
+def kmeans(vectors: np.ndarray, k: int, iterations: int = 20, seed: int = 0,
+           metric: str = 'ip', max_train: int = 100000) -> np.ndarray:
+    """
+    Lloyd's k-means on (a sample of) vectors. With metric 'ip' the centroids are
+    kept unit-length (spherical k-means), matching cosine search on normalized vectors.
+    """
+    rng = np.random.default_rng(seed)
+    if len(vectors) > max_train:
+        vectors = vectors[np.sort(rng.choice(len(vectors), max_train, replace=False))]
+    vectors = np.asarray(vectors, dtype=np.float32)
+    k = min(k, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = _nearest_centroids(vectors, centroids, metric)
+        counts = np.bincount(assignments, minlength=k)
+        order = np.argsort(assignments, kind='stable')
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        empty = counts == 0
+        sums = np.zeros_like(centroids)
+        sums[~empty] = np.add.reduceat(vectors[order], starts[~empty], axis=0)
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        # Re-seed empty clusters with random points.
+        if empty.any():
+            centroids[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        if metric == 'ip':
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids /= norms
+    return centroids
+
+
+class ExactIndex:
+    """Brute-force inner-product search; the reference the approximate backends are measured against."""
+
+    kind = 'exact'
+
+    def __init__(self):
+        self.vectors = None
+
+    def build(self, vectors: np.ndarray) -> "ExactIndex":
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        return self
+
+    def search(self, query_vectors: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        scores = np.atleast_2d(query_vectors).astype(np.float32) @ self.vectors.T
+        indices = top_k_indices(scores, top_k)
+        return indices, np.take_along_axis(scores, indices, axis=1)
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        return {'vectors': self.vectors}
+
+    def _restore(self, arrays: Dict[str, np.ndarray], params: Dict, path: str):
+        self.vectors = arrays['vectors']
+
+    def params(self) -> Dict:
+        return {}
+
+    def memory_bytes(self) -> int:
+        return int(self.vectors.nbytes)
+
+
+class IVFIndex(ExactIndex):
+    """
+    Inverted-file index: vectors are bucketed by their nearest of n_lists centroids,
+    and a query scores only the buckets of its n_probe nearest centroids.
+    """
+
+    kind = 'ivf'
+
+    def __init__(self, n_lists: int = 0, n_probe: int = 8, iterations: int = 20, seed: int = 0):
+        super().__init__()
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.iterations = iterations
+        self.seed = seed
+        self.centroids = None
+        self.order = None
+        self.offsets = None
+
+    def _build_lists(self, vectors: np.ndarray):
+        n_lists = self.n_lists or max(1, int(np.sqrt(len(vectors))))
+        self.centroids = kmeans(vectors, n_lists, self.iterations, self.seed)
+        self.n_lists = len(self.centroids)
+        assignments = _nearest_centroids(vectors, self.centroids, 'ip')
+        # Rows sorted by list, with offsets[c]:offsets[c + 1] being list c.
+        self.order = np.argsort(assignments, kind='stable')
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=self.n_lists))])
+
+    def build(self, vectors: np.ndarray) -> "IVFIndex":
+        super().build(vectors)
+        self._build_lists(self.vectors)
+        return self
+
+    def _candidates(self, query_vector: np.ndarray) -> np.ndarray:
+        probe = min(self.n_probe, self.n_lists)
+        lists = np.argpartition(-(self.centroids @ query_vector), probe - 1)[:probe]
+        return np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in lists])
+
+    def _score_candidates(self, query_vector: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+        return self.vectors[candidates] @ query_vector
+
+    def search(self, query_vectors: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        query_vectors = np.atleast_2d(query_vectors).astype(np.float32)
+        all_indices = np.empty((len(query_vectors), top_k), dtype=np.int64)
+        all_scores = np.empty((len(query_vectors), top_k), dtype=np.float32)
+        for q, query_vector in enumerate(query_vectors):
+            candidates = self._candidates(query_vector)
+            scores = self._score_candidates(query_vector, candidates)
+            best = top_k_indices(scores[None, :], top_k)[0]
+            all_indices[q], all_scores[q] = _pad_results(candidates[best], scores[best], top_k)
+        return all_indices, all_scores
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        return {'vectors': self.vectors, 'centroids': self.centroids, 'order': self.order, 'offsets': self.offsets}
+
+    def _restore(self, arrays: Dict[str, np.ndarray], params: Dict, path: str):
+        self.vectors = arrays['vectors']
+        self.centroids = arrays['centroids']
+        self.order = arrays['order']
+        self.offsets = arrays['offsets']
+
+    def params(self) -> Dict:
+        return {'n_lists': self.n_lists, 'n_probe': self.n_probe, 'iterations': self.iterations, 'seed': self.seed}
+
+    def memory_bytes(self) -> int:
+        return int(sum(a.nbytes for a in self._arrays().values()))
+
+
+class IVFPQIndex(IVFIndex):
+    """
+    IVF with product quantization: each vector is split into n_subspaces chunks and
+    every chunk is stored as a one-byte code into a 256-entry codebook. Probed
+    candidates are scored from per-query lookup tables instead of full vectors,
+    so the index keeps no float vectors at all.
+    """
+
+    kind = 'ivfpq'
+
+    def __init__(self, n_lists: int = 0, n_probe: int = 8, n_subspaces: int = 48,
+                 iterations: int = 20, seed: int = 0):
+        super().__init__(n_lists, n_probe, iterations, seed)
+        self.n_subspaces = n_subspaces
+        self.codebooks = None
+        self.codes = None
+
+    def _split(self, vectors: np.ndarray) -> np.ndarray:
+        n, dim = vectors.shape
+        return vectors.reshape(n, self.n_subspaces, dim // self.n_subspaces)
+
+    def build(self, vectors: np.ndarray) -> "IVFPQIndex":
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.shape[1] % self.n_subspaces:
+            raise ValueError(f"Dimension {vectors.shape[1]} is not divisible by n_subspaces={self.n_subspaces}")
+        self._build_lists(vectors)
+        parts = self._split(vectors)
+        self.codebooks = np.stack([
+            kmeans(parts[:, s], 256, self.iterations, self.seed + s, metric='l2', max_train=PQ_MAX_TRAIN)
+            for s in range(self.n_subspaces)
+        ])
+        self.codes = np.stack([
+            _nearest_centroids(parts[:, s], self.codebooks[s], 'l2') for s in range(self.n_subspaces)
+        ], axis=1).astype(np.uint8)
+        return self
+
+    def _score_candidates(self, query_vector: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+        # table[s, c] = <query chunk s, codeword c of subspace s>
+        table = np.einsum('sd,scd->sc', self._split(query_vector[None, :])[0], self.codebooks)
+        codes = self.codes[candidates]
+        return table[np.arange(self.n_subspaces), codes].sum(axis=1)
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        return {'centroids': self.centroids, 'order': self.order, 'offsets': self.offsets,
+                'codebooks': self.codebooks, 'codes': self.codes}
+
+    def _restore(self, arrays: Dict[str, np.ndarray], params: Dict, path: str):
+        self.centroids = arrays['centroids']
+        self.order = arrays['order']
+        self.offsets = arrays['offsets']
+        self.codebooks = arrays['codebooks']
+        self.codes = arrays['codes']
+
+    def params(self) -> Dict:
+        return dict(super().params(), n_subspaces=self.n_subspaces)
+
+
+class HNSWIndex:
+    """Hierarchical navigable small-world graph, built locally with the optional hnswlib package."""
+
+    kind = 'hnsw'
+
+    def __init__(self, m: int = 16, ef_construction: int = 200, ef_search: int = 64, seed: int = 0):
+        if hnswlib is None:
+            raise ImportError("The 'hnsw' backend requires the hnswlib package (pip install hnswlib)")
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.seed = seed
+        self.graph = None
+        self.dim = None
+        self.count = 0
+
+    def build(self, vectors: np.ndarray) -> "HNSWIndex":
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.dim = vectors.shape[1]
+        self.count = len(vectors)
+        self.graph = hnswlib.Index(space='ip', dim=self.dim)
+        self.graph.init_index(max_elements=max(1, self.count), M=self.m,
+                              ef_construction=self.ef_construction, random_seed=self.seed)
+        self.graph.add_items(vectors, np.arange(self.count))
+        self.graph.set_ef(self.ef_search)
+        return self
+
+    def search(self, query_vectors: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        query_vectors = np.atleast_2d(query_vectors).astype(np.float32)
+        k = min(top_k, self.count)
+        self.graph.set_ef(max(self.ef_search, k))
+        labels, distances = self.graph.knn_query(query_vectors, k=k)
+        # hnswlib's 'ip' distance is 1 - <q, v>.
+        indices, scores = labels.astype(np.int64), (1.0 - distances).astype(np.float32)
+        if k < top_k:
+            padded = [_pad_results(i, s, top_k) for i, s in zip(indices, scores)]
+            indices = np.stack([i for i, _ in padded])
+            scores = np.stack([s for _, s in padded])
+        return indices, scores
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        return {}
+
+    def _restore(self, arrays: Dict[str, np.ndarray], params: Dict, path: str):
+        self.dim = params['dim']
+        self.count = params['count']
+        self.graph = hnswlib.Index(space='ip', dim=self.dim)
+        self.graph.load_index(path + '.hnsw', max_elements=max(1, self.count))
+        self.graph.set_ef(self.ef_search)
+
+    def params(self) -> Dict:
+        return {'m': self.m, 'ef_construction': self.ef_construction, 'ef_search': self.ef_search,
+                'seed': self.seed, 'dim': self.dim, 'count': self.count}
+
+    def memory_bytes(self) -> int:
+        # Vectors plus roughly 2 * M neighbour ids per node on the base layer.
+        return int(self.count * (self.dim * 4 + 2 * self.m * 4))
+
+
+ANN_BACKENDS: Dict[str, Type] = {
+    'exact': ExactIndex,
+    'ivf': IVFIndex,
+    'ivfpq': IVFPQIndex,
+    'hnsw': HNSWIndex
+}
+
+
+def build_ann_index(kind: str, vectors: np.ndarray, **params):
+    """Builds a vector index of the given kind ('exact', 'ivf', 'ivfpq' or 'hnsw') over normalized vectors."""
+    if kind not in ANN_BACKENDS:
+        raise ValueError(f"Unknown ANN backend '{kind}'. Choose from: {', '.join(ANN_BACKENDS)}")
+    return ANN_BACKENDS[kind](**params).build(vectors)
+
+
+def save_ann_index(index, path: str):
+    """
+    Saves an index as '<path>.npz' (arrays) and '<path>.json' (kind and parameters);
+    the hnsw backend adds its graph as '<path>.hnsw'.
+    """
+    np.savez(path + '.npz', **index._arrays())
+    if index.kind == 'hnsw':
+        index.graph.save_index(path + '.hnsw')
+    with open(path + '.json', 'w', encoding='utf-8') as f:
+        json.dump({'kind': index.kind, 'params': index.params()}, f)
+
+
+def load_ann_index(path: str):
+    """Loads an index written by save_ann_index."""
+    if not os.path.exists(path + '.json'):
+        raise FileNotFoundError(f"ANN index not found at '{path}'")
+    with open(path + '.json', encoding='utf-8') as f:
+        meta = json.load(f)
+    params = meta['params']
+    backend = ANN_BACKENDS[meta['kind']]
+    constructor_params = {k: v for k, v in params.items() if k not in ('dim', 'count')}
+    index = backend(**constructor_params)
+    with np.load(path + '.npz', allow_pickle=False) as data:
+        arrays = {name: data[name] for name in data.files}
+    index._restore(arrays, params, path)
+    return index
@@ -1,5 +1,12 @@
+import logging
+import time
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
 from ortools.sat.python import cp_model
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple, Union
+from schedule_model import CompactSchedule, iter_bits
+
+logger = logging.getLogger(__name__)
 
 class SchedulingError(Exception):
     """Custom exception for scheduling errors"""
@@ -25,20 +32,543 @@ def validate_input(data: Dict) -> List[str]:
             
     return errors
 
-def solve_schedule(data: Dict) -> Dict[str, Any]:
+def index_teacher_slots(teachers: List[Dict]) -> Dict[str, List[int]]:
+    """Maps each time slot to the indices of the teachers available in it."""
+    slot_teachers = {}
+    for j, teacher in enumerate(teachers):
+        for slot in set(teacher['available_slots']):
+            slot_teachers.setdefault(slot, []).append(j)
+    return slot_teachers
+
+def group_sessions(courses: List[Dict]) -> Dict[str, List[int]]:
+    """Groups session indices by course id ("Course Name_Class Code"), i.e. by section."""
+    course_groups = {}
+    for i, course in enumerate(courses):
+        course_groups.setdefault(course['id'], []).append(i)
+    return course_groups
+
+def intersect_group_candidates(course_groups: Dict[str, List[int]],
+                               session_candidates: Dict[int, List[int]]) -> Dict[str, List[int]]:
+    """Candidate teachers of each course group: those available at every one of its sessions."""
+    group_candidates = {}
+    for course_id, indices in course_groups.items():
+        common = set(session_candidates[indices[0]]).intersection(*(session_candidates[i] for i in indices[1:]))
+        group_candidates[course_id] = sorted(common)
+    return group_candidates
+
+def teacher_slot_buckets(courses: List[Dict], course_groups: Dict[str, List[int]],
+                         group_candidates: Dict[str, List[int]]) -> Dict[Tuple[int, str], List[str]]:
+    """Course groups that could put teacher j in each time slot, keyed by (j, slot)."""
+    buckets = {}
+    for course_id, indices in course_groups.items():
+        for slot in set(courses[i]['time_slot'] for i in indices):
+            for j in group_candidates[course_id]:
+                buckets.setdefault((j, slot), []).append(course_id)
+    return buckets
+
+def teacher_load_groups(group_candidates: Dict[str, List[int]]) -> Dict[int, List[str]]:
+    """Course groups each teacher is a candidate for."""
+    groups = {}
+    for course_id, candidates in group_candidates.items():
+        for j in candidates:
+            groups.setdefault(j, []).append(course_id)
+    return groups
+
+def section_size(courses: List[Dict], indices: List[int], capacity: int) -> int:
+    """
+    Students in a section: its 'enrolled' count, else its seat 'capacity' (a full
+    section), else the teacher's capacity (a full class for them).
+    """
+    section = courses[indices[0]]
+    size = section.get('enrolled', section.get('capacity'))
+    return capacity if size is None else int(size)
+
+def over_capacity(courses: List[Dict], course_groups: Dict[str, List[int]]) -> List[Dict]:
+    """Conflict records for sections enrolling more students than their seat 'capacity'."""
+    conflicts = []
+    for course_id, indices in course_groups.items():
+        section = courses[indices[0]]
+        enrolled, capacity = section.get('enrolled'), section.get('capacity')
+        if enrolled is not None and capacity is not None and int(enrolled) > int(capacity):
+            conflicts.append({
+                'type': 'over_capacity',
+                'course': section['name'],
+                'enrolled': int(enrolled),
+                'capacity': int(capacity),
+                'message': f"{section['name']} (ID: {course_id}) has {int(enrolled)} students enrolled "
+                           f"but only {int(capacity)} seats."
+            })
+    return conflicts
+
+def slot_limit(teacher: Dict) -> Optional[int]:
+    """Students a teacher can take in one time slot ('max_students'); None means one section at a time."""
+    return teacher.get('max_students')
+
+def load_limit(teacher: Dict, max_teacher_load: Optional[int]) -> Optional[int]:
+    """Weekly sessions a teacher may teach: their own 'max_load', else the global limit."""
+    return teacher.get('max_load', max_teacher_load)
+
+def build_schedule_model(courses: List[Dict], teachers: List[Dict], course_groups: Dict[str, List[int]],
+                         group_candidates: Dict[str, List[int]], no_overlap: bool = False,
+                         max_teacher_load: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Builds the CP-SAT model with one Boolean variable y[course_id, j] per course group
+    and candidate teacher j. All sessions of a group share these variables, so keeping a
+    group's teacher uniform needs no constraints and the model is linear in size:
+    one variable per (group, candidate) and one exactly-one constraint per group.
+    The objective counts sessions taught by their preferred teacher.
+
+    no_overlap adds one constraint per (teacher, time slot) bucket that could hold more
+    than one section: at most one section, or, for teachers with 'max_students', at most
+    that many enrolled students (so combined sections that fit are allowed). Teaching
+    load adds one constraint per teacher whose candidate sessions exceed their limit.
+    """
+    model = cp_model.CpModel()
+    y = {}
+    objective_vars, objective_weights = [], []
+    for g, (course_id, indices) in enumerate(course_groups.items()):
+        candidates = group_candidates[course_id]
+        for j in candidates:
+            y[(course_id, j)] = model.NewBoolVar(f'y_{g}_{j}')
+            weight = sum(1 for i in indices if courses[i]['preferred_teacher'] == teachers[j]['name'])
+            if weight:
+                objective_vars.append(y[(course_id, j)])
+                objective_weights.append(weight)
+        # Each group must be assigned exactly one teacher (infeasible if it has none).
+        model.AddExactlyOne(y[(course_id, j)] for j in candidates)
+
+    # Long sums are built with WeightedSum; Python's sum() over model expressions is quadratic.
+    if no_overlap:
+        for (j, slot), group_ids in teacher_slot_buckets(courses, course_groups, group_candidates).items():
+            capacity = slot_limit(teachers[j])
+            if capacity is None:
+                if len(group_ids) > 1:
+                    model.AddAtMostOne(y[(course_id, j)] for course_id in group_ids)
+                continue
+            sizes = {course_id: section_size(courses, course_groups[course_id], capacity) for course_id in group_ids}
+            if sum(sizes.values()) > capacity:
+                model.Add(cp_model.LinearExpr.WeightedSum([y[(course_id, j)] for course_id in sizes],
+                                                          list(sizes.values())) <= capacity)
+
+    for j, group_ids in teacher_load_groups(group_candidates).items():
+        limit = load_limit(teachers[j], max_teacher_load)
+        if limit is not None and sum(len(course_groups[course_id]) for course_id in group_ids) > limit:
+            model.Add(cp_model.LinearExpr.WeightedSum([y[(course_id, j)] for course_id in group_ids],
+                                                      [len(course_groups[course_id]) for course_id in group_ids]) <= limit)
+
+    model.Maximize(cp_model.LinearExpr.WeightedSum(objective_vars, objective_weights))
+    return {'model': model, 'y': y}
+
+def prune_candidates(courses: List[Dict], teachers: List[Dict], course_groups: Dict[str, List[int]],
+                     group_candidates: Dict[str, List[int]], no_overlap: bool = False,
+                     max_teacher_load: Optional[int] = None) -> Dict[str, List[int]]:
+    """Drops candidates a group could never use on its own: too many sessions or students for the teacher."""
+    # Only teachers with their own limits need checking per candidate; the global load
+    # limit depends on the group alone.
+    limited = set(j for j, teacher in enumerate(teachers)
+                  if 'max_load' in teacher or (no_overlap and slot_limit(teacher) is not None))
+
+    def fits(j, indices):
+        limit = load_limit(teachers[j], max_teacher_load)
+        if limit is not None and len(indices) > limit:
+            return False
+        capacity = slot_limit(teachers[j])
+        return not (no_overlap and capacity is not None and section_size(courses, indices, capacity) > capacity)
+
+    pruned = {}
+    for course_id, candidates in group_candidates.items():
+        indices = course_groups[course_id]
+        if max_teacher_load is not None and len(indices) > max_teacher_load:
+            pruned[course_id] = [j for j in candidates if fits(j, indices)]
+        elif limited:
+            pruned[course_id] = [j for j in candidates if j not in limited or fits(j, indices)]
+        else:
+            pruned[course_id] = candidates
+    return pruned
+
+def constraint_links(courses: List[Dict], teachers: List[Dict], course_groups: Dict[str, List[int]],
+                     group_candidates: Dict[str, List[int]], no_overlap: bool = False,
+                     max_teacher_load: Optional[int] = None) -> List[List[str]]:
+    """
+    The sets of course groups tied together by a cross-group constraint that can bind,
+    i.e. the buckets build_schedule_model adds a constraint for.
+    """
+    links = []
+    if no_overlap:
+        for (j, slot), group_ids in teacher_slot_buckets(courses, course_groups, group_candidates).items():
+            capacity = slot_limit(teachers[j])
+            if len(group_ids) > 1 and (capacity is None or sum(
+                    section_size(courses, course_groups[course_id], capacity) for course_id in group_ids) > capacity):
+                links.append(group_ids)
+    for j, group_ids in teacher_load_groups(group_candidates).items():
+        limit = load_limit(teachers[j], max_teacher_load)
+        if limit is not None and sum(len(course_groups[course_id]) for course_id in group_ids) > limit:
+            links.append(group_ids)
+    return links
+
+# Alternatives (besides the preferred ones) offered to each overloaded group in a repair.
+REPAIR_ALTERNATIVES = 16
+
+def repair_alternatives(indices: List[int], candidates: List[int], busy: set, load: Dict[int, int],
+                        courses: List[Dict], teachers: List[Dict], max_teacher_load: Optional[int] = None,
+                        offset: int = 0) -> List[int]:
+    """
+    Candidates an overloaded group may move to in a repair: every teacher preferred by
+    one of its sessions, plus REPAIR_ALTERNATIVES others, preferring teachers whose picks
+    leave them free at the group's slots (busy holds (teacher, slot) pairs) and under
+    their load limit (load counts picked sessions). The sorted candidates are scanned
+    from a per-group offset so that overloaded groups do not all crowd onto the same teachers.
+    """
+    preferred = set(courses[i]['preferred_teacher'] for i in indices)
+    slots = set(courses[i]['time_slot'] for i in indices)
+    kept = [j for j in candidates if teachers[j]['name'] in preferred]
+    start = bisect_left(candidates, offset % len(teachers)) if candidates else 0
+    free, taken = [], []
+    for k in range(len(candidates)):
+        j = candidates[(start + k) % len(candidates)]
+        if teachers[j]['name'] in preferred:
+            continue
+        limit = load_limit(teachers[j], max_teacher_load)
+        if any((j, slot) in busy for slot in slots) or (limit is not None and load.get(j, 0) + len(indices) > limit):
+            if len(taken) < REPAIR_ALTERNATIVES:
+                taken.append(j)
+        else:
+            free.append(j)
+            if len(free) == REPAIR_ALTERNATIVES:
+                break
+    return sorted(kept + (free + taken)[:REPAIR_ALTERNATIVES])
+
+def overloaded_groups(courses: List[Dict], teachers: List[Dict], course_groups: Dict[str, List[int]],
+                      picks: Dict[str, int], no_overlap: bool = False,
+                      max_teacher_load: Optional[int] = None) -> set:
+    """
+    Course groups whose picked teacher would exceed a no-overlap or teaching load
+    limit if every group got its pick; empty when the picks are feasible as they are.
+    """
+    slot_groups, week_groups = {}, {}
+    for course_id, j in picks.items():
+        if no_overlap:
+            for slot in set(courses[i]['time_slot'] for i in course_groups[course_id]):
+                slot_groups.setdefault((j, slot), []).append(course_id)
+        week_groups.setdefault(j, []).append(course_id)
+    overloaded = set()
+    for (j, slot), group_ids in slot_groups.items():
+        capacity = slot_limit(teachers[j])
+        if capacity is None:
+            if len(group_ids) > 1:
+                overloaded.update(group_ids)
+        elif sum(section_size(courses, course_groups[course_id], capacity) for course_id in group_ids) > capacity:
+            overloaded.update(group_ids)
+    for j, group_ids in week_groups.items():
+        limit = load_limit(teachers[j], max_teacher_load)
+        if limit is not None and sum(len(course_groups[course_id]) for course_id in group_ids) > limit:
+            overloaded.update(group_ids)
+    return overloaded
+
+def greedy_repair(courses: List[Dict], teachers: List[Dict], course_groups: Dict[str, List[int]],
+                  candidates: Dict[str, List[int]], picks: Dict[str, int], overloaded: set,
+                  no_overlap: bool = False, max_teacher_load: Optional[int] = None) -> Optional[Dict[str, int]]:
+    """
+    A feasible starting point for the repair: groups outside overloaded keep their pick,
+    then each overloaded group (most preferred sessions first) takes its pick if it still
+    fits, else the first of its candidates that does. None if some group fits nowhere.
+    """
+    slot_load, week_load = {}, {}
+
+    def usage(course_id, j):
+        indices = course_groups[course_id]
+        capacity = slot_limit(teachers[j])
+        size = 1 if capacity is None else section_size(courses, indices, capacity)
+        slots = set(courses[i]['time_slot'] for i in indices) if no_overlap else ()
+        return slots, size, len(indices), (1 if capacity is None else capacity), load_limit(teachers[j], max_teacher_load)
+
+    def fits(course_id, j):
+        slots, size, sessions, capacity, limit = usage(course_id, j)
+        if limit is not None and week_load.get(j, 0) + sessions > limit:
+            return False
+        return all(slot_load.get((j, slot), 0) + size <= capacity for slot in slots)
+
+    def take(course_id, j):
+        slots, size, sessions, _, _ = usage(course_id, j)
+        week_load[j] = week_load.get(j, 0) + sessions
+        for slot in slots:
+            slot_load[(j, slot)] = slot_load.get((j, slot), 0) + size
+
+    assignment = {}
+    for course_id, j in picks.items():
+        if course_id not in overloaded:
+            assignment[course_id] = j
+            take(course_id, j)
+
+    def preferred_sessions(course_id):
+        name = teachers[picks[course_id]]['name']
+        return sum(1 for i in course_groups[course_id] if courses[i]['preferred_teacher'] == name)
+
+    for course_id in sorted(overloaded, key=lambda course_id: -preferred_sessions(course_id)):
+        options = [picks[course_id]] + [j for j in candidates[course_id] if j != picks[course_id]]
+        j = next((j for j in options if fits(course_id, j)), None)
+        if j is None:
+            return None
+        assignment[course_id] = j
+        take(course_id, j)
+    return assignment
+
+def repair_bound(courses: List[Dict], teachers: List[Dict], course_groups: Dict[str, List[int]],
+                 picks: Dict[str, int], component: List[str]) -> int:
+    """
+    Upper bound on the preferred sessions of a component: every group taught by its
+    pick (best_candidate), which is the most any of its candidates could give it.
+    """
+    return sum(1 for course_id in component for i in course_groups[course_id]
+               if courses[i]['preferred_teacher'] == teachers[picks[course_id]]['name'])
+
+def decompose_groups(course_ids: List[str], links: List[List[str]]) -> List[List[str]]:
+    """
+    Splits course groups into independent components with a union-find over links,
+    each a list of groups to keep together: the constraint links (see constraint_links)
+    or, for the full model, the groups sharing a candidate teacher. Groups in no link
+    form singleton components.
+    """
+    parent = {course_id: course_id for course_id in course_ids}
+
+    def find(course_id):
+        while parent[course_id] != course_id:
+            parent[course_id] = parent[parent[course_id]]
+            course_id = parent[course_id]
+        return course_id
+
+    for group_ids in links:
+        root = find(group_ids[0])
+        for course_id in group_ids[1:]:
+            other = find(course_id)
+            if other != root:
+                parent[other] = root
+    components = {}
+    for course_id in course_ids:
+        components.setdefault(find(course_id), []).append(course_id)
+    return list(components.values())
+
+def best_candidate(sessions: List[Dict], candidates: List[int], teachers: List[Dict],
+                   hint: Optional[str] = None) -> int:
+    """
+    Optimal teacher of an independent group: the candidate preferred by the most
+    sessions, breaking ties towards the hinted teacher, then the lowest index.
+    """
+    counts = {}
+    for session in sessions:
+        counts[session['preferred_teacher']] = counts.get(session['preferred_teacher'], 0) + 1
+    best, best_key = candidates[0], None
+    for j in candidates:
+        name = teachers[j]['name']
+        if name in counts or name == hint:
+            key = (counts.get(name, 0), name == hint)
+            if best_key is None or key > best_key:
+                best, best_key = j, key
+    return best
+
+def group_conflict(course_id: str, sessions: List[Dict], group_avail_intersection: set) -> Optional[Dict]:
+    """
+    Conflict record for one course group, or None.
+    Alternatives are the teachers recorded for the group's sessions that are also
+    available at every one of them; none at all makes the schedule infeasible.
+    """
+    # Get the default teachers recorded in the raw data for this course group.
+    group_default = set(session['preferred_teacher'] for session in sessions)
+    # Now, restrict alternatives to those teachers that are recorded for this course.
+    group_available = group_default & group_avail_intersection if group_avail_intersection is not None else group_default
+    
+    logger.debug("Course '%s': Default teachers: %s, Intersection: %s, Final alternatives: %s",
+                 course_id, group_default, group_avail_intersection, group_available)
+    
+    # Use the preferred teacher from the first session (they should be uniform now).
+    name = sessions[0]['name']
+    preferred = sessions[0]['preferred_teacher']
+    if not group_available:
+        return {
+            'type': 'no_teachers',
+            'course': name,
+            'message': f"No teachers available for {name} (ID: {course_id}) across all sessions."
+        }
+    if preferred not in group_available:
+        return {
+            'type': 'preferred_unavailable',
+            'course': name,
+            'preferred_teacher': preferred,
+            'available_teachers': sorted(group_available),
+            'message': f"Preferred teacher {preferred} not available for {name} (ID: {course_id}). Alternatives: {', '.join(sorted(group_available))}."
+        }
+    return None
+
+def configure_solver(solver: cp_model.CpSolver, max_time_in_seconds: Optional[float] = None,
+                     num_search_workers: Optional[int] = None, log_search_progress: bool = False):
+    """Applies the solver performance settings; None keeps the CP-SAT default."""
+    if max_time_in_seconds is not None:
+        solver.parameters.max_time_in_seconds = max_time_in_seconds
+    if num_search_workers is not None:
+        solver.parameters.num_search_workers = num_search_workers
+    if log_search_progress:
+        # Route the CP-SAT search log through this module's logger instead of stdout.
+        solver.parameters.log_search_progress = True
+        solver.parameters.log_to_stdout = False
+        solver.log_callback = logger.info
+
+def solver_statistics(solver: cp_model.CpSolver, status) -> Dict[str, Any]:
+    """The solver's search statistics for the result dict."""
+    return {
+        'status': solver.StatusName(status),
+        'branches': solver.NumBranches(),
+        'conflicts': solver.NumConflicts(),
+        'wall_time': solver.WallTime(),
+        'objective': solver.ObjectiveValue() if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) else None
+    }
+
+def add_solution_hints(model: cp_model.CpModel, y: Dict, teachers: List[Dict], hints: Dict[str, str]):
+    """Hints each course group (by course id) towards the named teacher, e.g. a previous solution."""
+    hinted_groups = set()
+    for (course_id, j), var in y.items():
+        if course_id in hints:
+            model.AddHint(var, teachers[j]['name'] == hints[course_id])
+            hinted_groups.add(course_id)
+    logger.debug("Added solution hints for %d course groups", len(hinted_groups))
+
+def solve_component(sessions: List[Dict], teachers: Dict[int, Dict], component_groups: Dict[str, List[int]],
+                    group_candidates: Dict[str, List[int]], hints: Optional[Dict[str, str]] = None,
+                    max_time_in_seconds: Optional[float] = None, num_search_workers: Optional[int] = None,
+                    log_search_progress: bool = False, no_overlap: bool = False,
+                    max_teacher_load: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Builds and solves the CP-SAT model of one component. sessions holds only the
+    component's sessions (component_groups indexes into it) and teachers maps the
+    component's candidate indices to their records, so the payload sent to a worker
+    process stays small. Returns the chosen teacher index per course id.
+    """
+    build_started = time.perf_counter()
+    built = build_schedule_model(sessions, teachers, component_groups, group_candidates,
+                                 no_overlap, max_teacher_load)
+    model, y = built['model'], built['y']
+    if hints:
+        add_solution_hints(model, y, teachers, hints)
+    model_build = time.perf_counter() - build_started
+
+    solver = cp_model.CpSolver()
+    configure_solver(solver, max_time_in_seconds, num_search_workers, log_search_progress)
+    solve_started = time.perf_counter()
+    status = solver.Solve(model)
+    solve = time.perf_counter() - solve_started
+    chosen = {}
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        for (course_id, j), var in y.items():
+            if solver.Value(var) == 1:
+                chosen[course_id] = j
+    return {
+        'status': status,
+        'chosen': chosen,
+        'solver_stats': solver_statistics(solver, status),
+        'timings': {'model_build': model_build, 'solve': solve}
+    }
+
+def component_payload(component: List[str], courses: List[Dict], teachers: List[Dict],
+                      course_groups: Dict[str, List[int]], group_candidates: Dict[str, List[int]]) -> Dict[str, Any]:
+    """The solve_component arguments restricted to one component's sessions and teachers."""
+    sessions, component_groups, candidates = [], {}, {}
+    for course_id in component:
+        component_groups[course_id] = list(range(len(sessions), len(sessions) + len(course_groups[course_id])))
+        sessions.extend(courses[i] for i in course_groups[course_id])
+        candidates[course_id] = group_candidates[course_id]
+    component_teachers = {j: teachers[j] for js in candidates.values() for j in js}
+    return {'sessions': sessions, 'teachers': component_teachers,
+            'component_groups': component_groups, 'group_candidates': candidates}
+
+def merge_solver_statistics(outcomes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combines per-component solver statistics; the status is the weakest one."""
+    statuses = [outcome['status'] for outcome in outcomes]
+    if any(status not in (cp_model.OPTIMAL, cp_model.FEASIBLE) for status in statuses):
+        status = next(status for status in statuses if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE))
+    elif all(status == cp_model.OPTIMAL for status in statuses):
+        status = cp_model.OPTIMAL
+    else:
+        status = cp_model.FEASIBLE
+    stats = [outcome['solver_stats'] for outcome in outcomes]
+    objectives = [s['objective'] for s in stats]
+    return {
+        'status': cp_model.CpSolver().StatusName(status),
+        'branches': sum(s['branches'] for s in stats),
+        'conflicts': sum(s['conflicts'] for s in stats),
+        'wall_time': sum(s['wall_time'] for s in stats),
+        'objective': sum(objectives) if None not in objectives else None,
+        'components': len(outcomes)
+    }
+
+def solve_schedule(data: Union[Dict, CompactSchedule], max_time_in_seconds: Optional[float] = None,
+                   num_search_workers: Optional[int] = None, hints: Optional[Dict[str, str]] = None,
+                   log_search_progress: bool = False, fast_path: bool = True,
+                   num_processes: int = 1, slot_teachers: Optional[Dict[str, List[int]]] = None,
+                   no_overlap: bool = False, max_teacher_load: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Assigns a teacher to every course session, maximizing sessions taught by their
+    preferred teacher.
+
+    Solver settings: max_time_in_seconds and num_search_workers are passed to CP-SAT
+    (None keeps its defaults), hints maps course ids to a teacher name to warm-start
+    the search, and log_search_progress sends the CP-SAT log to this module's logger.
+    Per-session debug output is logged at DEBUG level.
+
+    The result carries 'timings' (seconds spent in validation, model build and solve)
+    and, when CP-SAT ran, 'solver_stats' (status, branches, conflicts, wall time).
+
+    With fast_path, groups are split into components (decompose_groups) and every
+    group that shares no constrained teacher is given its best candidate directly;
+    only the remaining coupled components are sent to CP-SAT, one model per component.
+    Without it, the full model is split into the connected components of the
+    course-teacher graph (groups linked when they share a candidate teacher).
+    With num_processes > 1 the component models are solved concurrently on a process pool.
+    'fast_path' in the result counts the groups resolved each way; with several
+    components, 'solver_stats' and the model_build/solve timings are summed over them
+    ('solver_stats' always counts its 'components', 1 for a single model).
+
+    slot_teachers may pass a precomputed index_teacher_slots(data['teachers']) so that
+    callers solving many requests against the same teachers build it only once.
+
+    data may also be a CompactSchedule (schedule_model), whose availability bitsets give
+    every group's candidates with one AND per session; the dict form is converted with
+    its to_dict adapter for the remaining steps.
+
+    Sections may carry a seat 'capacity' and an 'enrolled' count; a section enrolling
+    more students than it seats is an 'over_capacity' conflict and makes the schedule
+    infeasible.
+
+    Optional constraints (off by default, since the registrar sheet lists combined
+    sections taught together in one slot): no_overlap keeps a teacher to one section
+    per time slot, or, for teachers with 'max_students', to that many students across
+    the sections they take in the slot (each sized by section_size);
+    max_teacher_load caps the weekly sessions of every teacher (a teacher's own
+    'max_load' takes precedence). Only groups these constraints actually tie together
+    are coupled in the fast path, where CP-SAT repairs just the groups whose picks break
+    a limit and the full model is solved only if the repair finds no solution. The
+    repair is a heuristic: its result is 'optimal' only when every group still gets its
+    best teacher ('repair_proven' in 'fast_path'), and 'feasible' otherwise; pass
+    fast_path=False for a proven optimum.
+    """
+    started = time.perf_counter()
+    timings = {'validation': 0.0, 'model_build': 0.0, 'solve': 0.0}
+    compact = data if isinstance(data, CompactSchedule) else None
+    if compact is not None:
+        data = compact.to_dict()
     try:
         # Basic input validation.
         if not isinstance(data, dict):
             return {
                 'feasible': False,
                 'error': 'Invalid input format',
-                'conflicts': []
+                'conflicts': [],
+                'timings': timings
             }
         if 'courses' not in data or 'teachers' not in data:
             return {
                 'feasible': False,
                 'error': 'Missing required data (courses or teachers)',
-                'conflicts': []
+                'conflicts': [],
+                'timings': timings
             }
             
         courses = data['courses']
@@ -62,148 +592,246 @@ def solve_schedule(data: Dict) -> Dict[str, Any]:
                     'type': 'invalid_data',
                     'message': f"Teacher {teacher.get('name', 'Unknown')} missing fields: {', '.join(missing)}"
                 })
+        timings['validation'] = time.perf_counter() - started
         if conflicts:
             return {
                 'feasible': False,
                 'error': 'Invalid data format',
-                'conflicts': conflicts
+                'conflicts': conflicts,
+                'timings': timings
             }
         
-        model = cp_model.CpModel()
-        # Create a Boolean decision variable x[i, j] for each course session (i) and teacher (j)
-        x = {}
-        for i, course in enumerate(courses):
-            for j, teacher in enumerate(teachers):
-                x[(i, j)] = model.NewBoolVar(f'x_{i}_{j}')
-                
-        # Each session must be assigned exactly one teacher.
-        for i, course in enumerate(courses):
-            model.Add(sum(x[(i, j)] for j in range(len(teachers))) == 1)
-            
-        # For each session, disable assignments for teachers not available at that session's time.
-        session_available = {}
-        for i, course in enumerate(courses):
-            available_set = set()
-            for j, teacher in enumerate(teachers):
-                if course['time_slot'] not in teacher['available_slots']:
-                    model.Add(x[(i, j)] == 0)
-                else:
-                    available_set.add(teacher['name'])
-            session_available[i] = available_set
-            # Debug print for each session.
-            print(f"Session {i} ({course['id']} at {course['time_slot']}): Available teachers: {available_set}")
-        
+        build_started = time.perf_counter()
         # Group sessions by unique course id (class code remains constant).
         # Here, we assume that course['id'] is constructed as "Course Name_Class Code"
-        course_groups = {}
-        for i, course in enumerate(courses):
-            # Using course id for grouping (which contains the class code).
-            key = course['id']
-            course_groups.setdefault(key, []).append(i)
-        
-        # Debug: Print grouped sessions.
-        print("\nGrouped sessions by course (by class code):")
-        for key, indices in course_groups.items():
-            print(f"Course '{key}': sessions {indices}")
-        
-        # Enforce uniform assignment for sessions in the same course group.
-        for group in course_groups.values():
-            if len(group) > 1:
-                for j in range(len(teachers)):
-                    for idx1 in range(len(group)):
-                        for idx2 in range(idx1+1, len(group)):
-                            i1 = group[idx1]
-                            i2 = group[idx2]
-                            model.Add(x[(i1, j)] == x[(i2, j)])
-        
+        course_groups = group_sessions(courses)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Grouped sessions by course (by class code):")
+            for key, indices in course_groups.items():
+                logger.debug("Course '%s': sessions %s", key, indices)
+
+        if compact is not None:
+            # Every session of a group must get the same teacher: AND the teacher bitsets
+            # of the group's slots, and test preferred teachers against the result.
+            masks = compact.group_masks()
+            group_candidates = compact.group_candidates(masks)
+            available_preferred = compact.available_preferred(masks)
+            if logger.isEnabledFor(logging.DEBUG):
+                for i, session in enumerate(compact.sessions):
+                    logger.debug("Session %d (%s at %s): Available teachers: %s", i, courses[i]['id'],
+                                 courses[i]['time_slot'], set(teachers[j]['name'] for j in
+                                                              iter_bits(compact.slot_teachers[session.slot])))
+        else:
+            # Index teachers by the time slots they are available in, so each session only
+            # looks up its own candidates instead of scanning every teacher.
+            if slot_teachers is None:
+                slot_teachers = index_teacher_slots(teachers)
+
+            # Candidate teachers (j) for each course session (i): those available at its time.
+            session_candidates = {}
+            for i, course in enumerate(courses):
+                session_candidates[i] = slot_teachers.get(course['time_slot'], [])
+            if logger.isEnabledFor(logging.DEBUG):
+                for i, course in enumerate(courses):
+                    logger.debug("Session %d (%s at %s): Available teachers: %s", i, course['id'],
+                                 course['time_slot'], set(teachers[j]['name'] for j in session_candidates[i]))
+
+            # Every session of a group must get the same teacher, so a group can only be
+            # taught by the teachers available at all of its sessions.
+            group_candidates = intersect_group_candidates(course_groups, session_candidates)
+
+            # Names of each group's recorded teachers that are available at all of its sessions
+            # (looked up in the sorted candidate list rather than naming every candidate).
+            teacher_indices = {}
+            for j, teacher in enumerate(teachers):
+                teacher_indices.setdefault(teacher['name'], []).append(j)
+            available_preferred = {}
+            for course_id, indices in course_groups.items():
+                candidates = group_candidates[course_id]
+                available_preferred[course_id] = set()
+                for name in set(courses[i]['preferred_teacher'] for i in indices):
+                    for j in teacher_indices.get(name, ()):
+                        k = bisect_left(candidates, j)
+                        if k < len(candidates) and candidates[k] == j:
+                            available_preferred[course_id].add(name)
+
         # Aggregate available teachers per course group.
         aggregated_conflicts = []
         for course_id, indices in course_groups.items():
-            # Get the default teachers recorded in the raw data for this course group.
-            group_default = set(courses[i]['preferred_teacher'] for i in indices)
-            # Compute the intersection of session availability.
-            group_avail_intersection = None
-            for i in indices:
-                if group_avail_intersection is None:
-                    group_avail_intersection = session_available[i].copy()
-                else:
-                    group_avail_intersection &= session_available[i]
-            # Now, restrict alternatives to those teachers that are recorded for this course.
-            group_available = group_default & group_avail_intersection if group_avail_intersection is not None else group_default
-            
-            # Debug: Print aggregated available teachers.
-            print(f"Course '{course_id}': Default teachers: {group_default}, Intersection: {group_avail_intersection}, Final alternatives: {group_available}")
-            
-            # Use the preferred teacher from the first session (they should be uniform now).
-            preferred = courses[indices[0]]['preferred_teacher']
-            if not group_available:
-                aggregated_conflicts.append({
-                    'type': 'no_teachers',
-                    'course': courses[indices[0]]['name'],
-                    'message': f"No teachers available for {courses[indices[0]]['name']} (ID: {course_id}) across all sessions."
-                })
-            elif preferred not in group_available:
-                aggregated_conflicts.append({
-                    'type': 'preferred_unavailable',
-                    'course': courses[indices[0]]['name'],
-                    'preferred_teacher': preferred,
-                    'available_teachers': sorted(group_available),
-                    'message': f"Preferred teacher {preferred} not available for {courses[indices[0]]['name']} (ID: {course_id}). Alternatives: {', '.join(sorted(group_available))}."
-                })
-                
+            conflict = group_conflict(course_id, [courses[i] for i in indices], available_preferred[course_id])
+            if conflict is not None:
+                aggregated_conflicts.append(conflict)
+
+        # Sections enrolling more students than they seat cannot be scheduled by any teacher.
+        aggregated_conflicts.extend(over_capacity(courses, course_groups))
+
         # If any course group has no available teachers, scheduling is infeasible.
-        if any(conflict['type'] == 'no_teachers' for conflict in aggregated_conflicts):
+        if any(conflict['type'] in ('no_teachers', 'over_capacity') for conflict in aggregated_conflicts):
+            timings['model_build'] = time.perf_counter() - build_started
             return {
                 'feasible': False,
                 'error': 'Scheduling conflicts detected',
                 'conflicts': aggregated_conflicts,
-                'assignments': []
+                'assignments': [],
+                'timings': timings
             }
         
-        # Add objective: maximize assignment of the preferred teacher.
-        objective_terms = []
-        for i, course in enumerate(courses):
-            for j, teacher in enumerate(teachers):
-                if teacher['name'] == course['preferred_teacher']:
-                    objective_terms.append(x[(i, j)])
-                else:
-                    objective_terms.append(0 * x[(i, j)])
-        model.Maximize(sum(objective_terms))
+        constrained = no_overlap or max_teacher_load is not None or any('max_load' in t for t in teachers)
+        if constrained:
+            pruned = prune_candidates(courses, teachers, course_groups, group_candidates,
+                                      no_overlap, max_teacher_load)
+            for course_id, candidates in pruned.items():
+                if group_candidates[course_id] and not candidates:
+                    name = courses[course_groups[course_id][0]]['name']
+                    aggregated_conflicts.append({
+                        'type': 'no_teachers',
+                        'course': name,
+                        'message': f"No available teacher for {name} (ID: {course_id}) is within the teaching load or class size limits."
+                    })
+            if any(conflict['type'] == 'no_teachers' for conflict in aggregated_conflicts):
+                timings['model_build'] = time.perf_counter() - build_started
+                return {
+                    'feasible': False,
+                    'error': 'Scheduling conflicts detected',
+                    'conflicts': aggregated_conflicts,
+                    'assignments': [],
+                    'timings': timings
+                }
+            group_candidates = pruned
         
-        print("\nObjective function built. Now solving the model...")
+        chosen = {}
+        if not fast_path:
+            # Groups that share no candidate teacher are independent: every connected
+            # component of the course-teacher graph is solved as its own model.
+            components = decompose_groups(list(course_groups), list(teacher_load_groups(group_candidates).values()))
+            component_hints = [{course_id: hints[course_id] for course_id in component if course_id in hints}
+                               if hints else None for component in components]
+            component_candidates = [{course_id: group_candidates[course_id] for course_id in component}
+                                    for component in components]
+        else:
+            components, component_hints, component_candidates = [], [], []
+            # Each group's own best teacher is optimal whenever the picks break no limit.
+            picks = {course_id: best_candidate([courses[i] for i in indices], group_candidates[course_id],
+                                               teachers, (hints or {}).get(course_id))
+                     for course_id, indices in course_groups.items()}
+            overloaded = overloaded_groups(courses, teachers, course_groups, picks,
+                                           no_overlap, max_teacher_load) if constrained else set()
+            if not overloaded:
+                chosen.update(picks)
+            else:
+                # Otherwise CP-SAT repairs only the overloaded groups, offering each its preferred
+                # teachers and a few free alternatives; the others keep their pick as their sole
+                # candidate, so the repair may miss the optimum (see repair_bound).
+                # Only components containing an overloaded group are solved, and if the repair
+                # finds no solution the full model is solved instead.
+                busy, load = set(), {}
+                for course_id, j in picks.items():
+                    load[j] = load.get(j, 0) + len(course_groups[course_id])
+                    if no_overlap:
+                        busy.update((j, courses[i]['time_slot']) for i in course_groups[course_id])
+                repair_candidates = {course_id: repair_alternatives(course_groups[course_id], candidates, busy, load,
+                                                                    courses, teachers, max_teacher_load,
+                                                                    g * REPAIR_ALTERNATIVES)
+                                     if course_id in overloaded else [picks[course_id]]
+                                     for g, (course_id, candidates) in enumerate(group_candidates.items())}
+                links = constraint_links(courses, teachers, course_groups, repair_candidates,
+                                         no_overlap, max_teacher_load)
+                # Start CP-SAT from a greedy feasible repair when there is one.
+                start = greedy_repair(courses, teachers, course_groups, repair_candidates, picks, overloaded,
+                                      no_overlap, max_teacher_load) or picks
+                repair_hints = {**{course_id: teachers[j]['name'] for course_id, j in start.items()}, **(hints or {})}
+                for component in decompose_groups(list(course_groups), links):
+                    if overloaded.isdisjoint(component):
+                        chosen.update((course_id, picks[course_id]) for course_id in component)
+                        continue
+                    components.append(component)
+                    component_hints.append({course_id: repair_hints[course_id] for course_id in component})
+                    component_candidates.append({course_id: repair_candidates[course_id] for course_id in component})
+        fast_path_stats = {'direct_groups': len(chosen),
+                           'solver_groups': sum(len(component) for component in components),
+                           'components': len(components)}
+        logger.debug("Fast path: %s", fast_path_stats)
+        timings['model_build'] = time.perf_counter() - build_started
         
-        solver = cp_model.CpSolver()
-        status = solver.Solve(model)
+        status = cp_model.OPTIMAL
+        solver_stats = None
+        if components:
+            logger.debug("Solving %d component(s) with CP-SAT...", len(components))
+            payloads = [component_payload(component, courses, teachers, course_groups, candidates)
+                        for component, candidates in zip(components, component_candidates)]
+            options = {'max_time_in_seconds': max_time_in_seconds,
+                       'num_search_workers': num_search_workers, 'log_search_progress': log_search_progress,
+                       'no_overlap': no_overlap, 'max_teacher_load': max_teacher_load}
+            if num_processes > 1 and len(payloads) > 1:
+                with ProcessPoolExecutor(max_workers=min(num_processes, len(payloads))) as pool:
+                    futures = [pool.submit(solve_component, **payload, hints=component_hint, **options)
+                               for payload, component_hint in zip(payloads, component_hints)]
+                    outcomes = [future.result() for future in futures]
+            else:
+                outcomes = [solve_component(**payload, hints=component_hint, **options)
+                            for payload, component_hint in zip(payloads, component_hints)]
+            repair_proven = None
+            if fast_path:
+                # A repair that found no solution (infeasible, or out of time) fixed too much:
+                # fall back to the full model.
+                if any(outcome['status'] not in (cp_model.OPTIMAL, cp_model.FEASIBLE) for outcome in outcomes):
+                    logger.debug("Repair found no solution; re-solving without the fast path")
+                    return solve_schedule(data if compact is None else compact, max_time_in_seconds, num_search_workers,
+                                          hints, log_search_progress, fast_path=False, num_processes=num_processes,
+                                          slot_teachers=slot_teachers, no_overlap=no_overlap,
+                                          max_teacher_load=max_teacher_load)
+                # The repair restricts most groups to their pick, so its optimum is only known
+                # to be optimal for the full problem when every component reaches its bound.
+                repair_proven = all(
+                    outcome['solver_stats']['objective'] >= repair_bound(courses, teachers, course_groups, picks, component)
+                    for outcome, component in zip(outcomes, components))
+                fast_path_stats['repair_proven'] = repair_proven
+            for outcome in outcomes:
+                chosen.update(outcome['chosen'])
+                timings['model_build'] += outcome['timings']['model_build']
+                timings['solve'] += outcome['timings']['solve']
+            solver_stats = merge_solver_statistics(outcomes)
+            logger.info("CP-SAT finished: %s", solver_stats)
+            status = getattr(cp_model, solver_stats['status'])
+            if repair_proven is not None:
+                status = cp_model.OPTIMAL if repair_proven else cp_model.FEASIBLE
         
         if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
             assignments = []
-            for i, course in enumerate(courses):
-                for j, teacher in enumerate(teachers):
-                    if solver.Value(x[(i, j)]) == 1:
-                        assignments.append({
-                            'course': course['name'],
-                            'teacher': teacher['name'],
-                            'time_slot': course['time_slot'],
-                            'preferred': teacher['name'] == course['preferred_teacher']
-                        })
-            print("Model solved successfully.")
-            return {
+            for course in courses:
+                teacher = teachers[chosen[course['id']]]
+                assignments.append({
+                    'course': course['name'],
+                    'teacher': teacher['name'],
+                    'time_slot': course['time_slot'],
+                    'preferred': teacher['name'] == course['preferred_teacher']
+                })
+            logger.debug("Model solved successfully.")
+            result = {
                 'feasible': True,
                 'assignments': assignments,
                 'conflicts': aggregated_conflicts,
-                'status': 'optimal' if status == cp_model.OPTIMAL else 'feasible'
+                'status': 'optimal' if status == cp_model.OPTIMAL else 'feasible',
+                'timings': timings,
+                'fast_path': fast_path_stats
             }
         else:
-            print("No feasible solution found.")
-            return {
+            logger.debug("No feasible solution found.")
+            result = {
                 'feasible': False,
                 'error': 'No feasible solution found',
                 'conflicts': aggregated_conflicts,
-                'assignments': []
+                'assignments': [],
+                'timings': timings,
+                'fast_path': fast_path_stats
             }
+        if solver_stats is not None:
+            result['solver_stats'] = solver_stats
+        return result
         
     except Exception as e:
-        print(f"Unexpected error occurred: {e}")
+        logger.exception("Unexpected error occurred: %s", e)
         return {
             'feasible': False,
             'error': f'Unexpected error: {str(e)}',
@@ -211,5 +839,196 @@ def solve_schedule(data: Dict) -> Dict[str, Any]:
                 'type': 'system_error',
                 'message': str(e)
             }],
-            'assignments': []
+            'assignments': [],
+            'timings': timings
+        }
+
+class ScheduleSession:
+    """
+    Keeps a built CP-SAT model and the last solution between solves, for interactive
+    what-if edits. Each course group owns its y variables plus an 'active' literal;
+    adding, removing or re-preferring a course only creates or re-weights that group's
+    variables, and solve() switches groups on and off with assumptions and warm-starts
+    from the previous assignment. Results have the same shape as solve_schedule.
+    hints (course id -> teacher name, as in solve_schedule) seed that assignment, e.g.
+    with a solve_schedule result for the same data, so the first solve is warm-started too.
+    """
+
+    def __init__(self, data: Union[Dict, CompactSchedule], max_time_in_seconds: Optional[float] = None,
+                 num_search_workers: Optional[int] = None, log_search_progress: bool = False,
+                 hints: Optional[Dict[str, str]] = None):
+        if isinstance(data, CompactSchedule):
+            data = data.to_dict()
+        errors = validate_input(data)
+        if errors:
+            raise SchedulingError('; '.join(errors))
+        self.teachers = data['teachers']
+        self.slot_teachers = index_teacher_slots(self.teachers)
+        self.max_time_in_seconds = max_time_in_seconds
+        self.num_search_workers = num_search_workers
+        self.log_search_progress = log_search_progress
+        self.model = cp_model.CpModel()
+        self.groups: Dict[str, Dict[str, Any]] = {}
+        self.last_solution: Dict[str, int] = {}
+        self._next_group = 0
+        self.add_courses(data['courses'])
+        if hints:
+            self.set_hints(hints)
+
+    def set_hints(self, hints: Dict[str, str]):
+        """Takes the named teachers (course id -> name) as the previous solution of those groups."""
+        for course_id, name in hints.items():
+            group = self.groups.get(course_id)
+            if group is None:
+                continue
+            j = next((j for j in group['candidates'] if self.teachers[j]['name'] == name), None)
+            if j is not None:
+                self.last_solution[course_id] = j
+
+    def _new_group(self, course_id: str, sessions: List[Dict]) -> Dict[str, Any]:
+        """Creates the variables and exactly-one-if-active constraint of one course group."""
+        g = self._next_group
+        self._next_group += 1
+        common = set(self.slot_teachers.get(sessions[0]['time_slot'], []))
+        for session in sessions[1:]:
+            common &= set(self.slot_teachers.get(session['time_slot'], []))
+        candidates = sorted(common)
+        y = {j: self.model.NewBoolVar(f'y_{g}_{j}') for j in candidates}
+        active = self.model.NewBoolVar(f'active_{g}')
+        if candidates:
+            assigned = cp_model.LinearExpr.Sum(list(y.values()))
+            self.model.Add(assigned == 1).OnlyEnforceIf(active)
+            self.model.Add(assigned == 0).OnlyEnforceIf(active.Not())
+        group = {'sessions': sessions, 'candidates': candidates, 'y': y, 'active': active, 'enabled': True}
+        self._weigh_group(group)
+        return group
+
+    def _weigh_group(self, group: Dict[str, Any]):
+        """Objective terms (variable, weight) of one group: sessions taught by their preferred teacher."""
+        terms = []
+        for j, var in group['y'].items():
+            weight = sum(1 for s in group['sessions'] if s['preferred_teacher'] == self.teachers[j]['name'])
+            if weight:
+                terms.append((var, weight))
+        group['objective_terms'] = terms
+
+    def _matching_groups(self, course: str) -> List[str]:
+        """Course ids matching a course id or a (case-insensitive) course name."""
+        if course in self.groups:
+            return [course]
+        name = course.strip().lower()
+        return [course_id for course_id, group in self.groups.items()
+                if group['sessions'][0]['name'].strip().lower() == name]
+
+    def add_courses(self, courses: List[Dict]):
+        """
+        Adds course sessions. A removed group with the same sessions is switched back
+        on (with the new preferences); a group whose time slots changed is retired
+        and rebuilt.
+        """
+        incoming: Dict[str, List[Dict]] = {}
+        for course in courses:
+            incoming.setdefault(course['id'], []).append(dict(course))
+        for course_id, sessions in incoming.items():
+            group = self.groups.get(course_id)
+            if group is not None and [s['time_slot'] for s in group['sessions']] == [s['time_slot'] for s in sessions]:
+                group['sessions'] = sessions
+                group['enabled'] = True
+                self._weigh_group(group)
+                continue
+            if group is not None:
+                # Variables cannot be deleted from a CpModel; pin the old group off.
+                self.model.Add(group['active'] == 0)
+                self.last_solution.pop(course_id, None)
+            self.groups[course_id] = self._new_group(course_id, sessions)
+
+    def remove_course(self, course: str) -> int:
+        """Disables the groups of a course (by id or name); returns how many matched."""
+        matched = self._matching_groups(course)
+        for course_id in matched:
+            self.groups[course_id]['enabled'] = False
+        return len(matched)
+
+    def set_preferred_teacher(self, course: str, teacher: str) -> int:
+        """Changes the preferred teacher of a course (by id or name); returns how many groups matched."""
+        matched = self._matching_groups(course)
+        for course_id in matched:
+            group = self.groups[course_id]
+            for session in group['sessions']:
+                session['preferred_teacher'] = teacher
+            self._weigh_group(group)
+        return len(matched)
+
+    def solve(self) -> Dict[str, Any]:
+        """Re-solves the current selection, hinted with the previous solution."""
+        timings = {'validation': 0.0, 'model_build': 0.0, 'solve': 0.0}
+        build_started = time.perf_counter()
+        enabled = [(course_id, group) for course_id, group in self.groups.items() if group['enabled']]
+        aggregated_conflicts = []
+        for course_id, group in enabled:
+            names = set(self.teachers[j]['name'] for j in group['candidates'])
+            conflict = group_conflict(course_id, group['sessions'], names)
+            if conflict is not None:
+                aggregated_conflicts.append(conflict)
+            aggregated_conflicts.extend(over_capacity(group['sessions'], {course_id: [0]}))
+        if any(conflict['type'] in ('no_teachers', 'over_capacity') for conflict in aggregated_conflicts):
+            timings['model_build'] = time.perf_counter() - build_started
+            return {
+                'feasible': False,
+                'error': 'Scheduling conflicts detected',
+                'conflicts': aggregated_conflicts,
+                'assignments': [],
+                'timings': timings
+            }
+
+        model = self.model
+        terms = [term for _, group in enabled for term in group['objective_terms']]
+        model.Maximize(cp_model.LinearExpr.WeightedSum([var for var, _ in terms], [weight for _, weight in terms]))
+        model.ClearHints()
+        for course_id, group in enabled:
+            if course_id in self.last_solution:
+                for j, var in group['y'].items():
+                    model.AddHint(var, j == self.last_solution[course_id])
+        model.ClearAssumptions()
+        model.AddAssumptions([group['active'] if group['enabled'] else group['active'].Not()
+                              for group in self.groups.values()])
+        timings['model_build'] = time.perf_counter() - build_started
+
+        solver = cp_model.CpSolver()
+        configure_solver(solver, self.max_time_in_seconds, self.num_search_workers, self.log_search_progress)
+        solve_started = time.perf_counter()
+        status = solver.Solve(model)
+        timings['solve'] = time.perf_counter() - solve_started
+        # One model, reported with the same keys as solve_schedule.
+        solver_stats = {**solver_statistics(solver, status), 'components': 1}
+        logger.info("CP-SAT re-solve finished: %s", solver_stats)
+
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return {
+                'feasible': False,
+                'error': 'No feasible solution found',
+                'conflicts': aggregated_conflicts,
+                'assignments': [],
+                'timings': timings,
+                'solver_stats': solver_stats
+            }
+        assignments = []
+        for course_id, group in enabled:
+            j = next(j for j, var in group['y'].items() if solver.Value(var) == 1)
+            self.last_solution[course_id] = j
+            teacher = self.teachers[j]['name']
+            for session in group['sessions']:
+                assignments.append({
+                    'course': session['name'],
+                    'teacher': teacher,
+                    'time_slot': session['time_slot'],
+                    'preferred': teacher == session['preferred_teacher']
+                })
+        return {
+            'feasible': True,
+            'assignments': assignments,
+            'conflicts': aggregated_conflicts,
+            'status': 'optimal' if status == cp_model.OPTIMAL else 'feasible',
+            'timings': timings,
+            'solver_stats': solver_stats
         }
@@ -0,0 +1,160 @@
+import argparse
+import json
+import sys
+import time
+from multiprocessing import Pool
+from typing import Any, Dict, List, Optional
+from Parsing import ParsedSchedule, load_schedule
+from backend import solve_schedule
+from schedule_model import CompactSchedule
+
+# Parsed schedule shared by every request a worker handles; set once per process.
+_schedule: Dict[str, Any] = {}
+
+
+def init_worker(schedule: ParsedSchedule, solve_options: Optional[Dict[str, Any]] = None):
+    _schedule.update(schedule_state(schedule, solve_options))
+
+
+def schedule_state(schedule: ParsedSchedule, solve_options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    The parsed schedule plus its compact form, whose tables and bitsets every request
+    shares, and the solve_schedule options (e.g. no_overlap) applied to every request.
+    """
+    return {'schedule': schedule, 'compact': CompactSchedule.from_dict(schedule.data),
+            'solve_options': solve_options or {}}
+
+
+def request_preferences(request: Dict) -> Optional[Dict[str, Optional[str]]]:
+    """
+    Course selection of one student: a {course name: preferred teacher} object, or a
+    list of course names. A null teacher keeps the teacher recorded for each session.
+    Returns None without 'courses'; raises ValueError when a teacher is not a string.
+    """
+    courses = request.get('courses')
+    if isinstance(courses, dict):
+        invalid = sorted(str(name) for name, teacher in courses.items()
+                         if teacher is not None and not isinstance(teacher, str))
+        if invalid:
+            raise ValueError(f"Preferred teacher must be a string or null for: {', '.join(invalid)}")
+        return {str(name).strip().lower(): teacher for name, teacher in courses.items()}
+    if isinstance(courses, list):
+        return {str(name).strip().lower(): None for name in courses}
+    return None
+
+
+def handle_line(line: str, schedule: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Schedules one JSON-lines request and returns the response record. A request that
+    fails gets an error record instead, so one bad line never stops the batch.
+    """
+    schedule = schedule or _schedule
+    started = time.perf_counter()
+    request_id = None
+
+    def failed(error: str) -> Dict[str, Any]:
+        return {'request_id': request_id, 'error': error,
+                'latency_ms': round((time.perf_counter() - started) * 1000, 3)}
+
+    try:
+        request = json.loads(line)
+    except json.JSONDecodeError as e:
+        return failed(f'Invalid JSON: {e}')
+    if not isinstance(request, dict):
+        return failed('Request must be a JSON object')
+    request_id = request.get('request_id', request.get('id'))
+    try:
+        preferences = request_preferences(request)
+        if preferences is None:
+            return failed("Missing 'courses'")
+        # Match typed course and teacher names as the interactive path does (filter_user_courses).
+        preferences = schedule['schedule'].resolve_preferences(preferences)
+        unknown = sorted(name for name in preferences if name not in schedule['schedule'].sessions_by_name)
+        result = solve_schedule(schedule['compact'].select(preferences), **schedule['solve_options'])
+    except ValueError as e:
+        return failed(str(e))
+    except Exception as e:
+        return failed(f'Unexpected error: {e}')
+    response = {'request_id': request_id, **result}
+    if unknown:
+        response['unknown_courses'] = unknown
+    response['latency_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    return response
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))] if ordered else 0.0
+
+
+def latency_stats(latencies: List[float], feasible: int, elapsed: float) -> Dict[str, Any]:
+    """Summary of a batch run: request count, feasibility, latency percentiles and throughput."""
+    return {
+        'requests': len(latencies),
+        'feasible': feasible,
+        'mean_ms': round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'max_ms': max(latencies, default=0.0),
+        'elapsed_s': round(elapsed, 3),
+        'requests_per_s': round(len(latencies) / elapsed, 1) if elapsed > 0 else None
+    }
+
+
+def run_batch(schedule: ParsedSchedule, lines, write, num_processes: int = 1, chunksize: int = 16,
+              solve_options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Schedules every request line against the parsed schedule and writes one JSON
+    response per line, in input order, as results arrive. Workers receive the parsed
+    schedule once at start-up. solve_options are passed to every solve_schedule call.
+    Returns the latency summary.
+    """
+    started = time.perf_counter()
+    latencies, feasible = [], 0
+    lines = (line for line in lines if line.strip())
+    pool = (Pool(num_processes, initializer=init_worker, initargs=(schedule, solve_options))
+            if num_processes > 1 else None)
+    try:
+        if pool is not None:
+            responses = pool.imap(handle_line, lines, chunksize=chunksize)
+        else:
+            state = schedule_state(schedule, solve_options)
+            responses = (handle_line(line, state) for line in lines)
+        for response in responses:
+            latencies.append(response['latency_ms'])
+            feasible += bool(response.get('feasible'))
+            write(json.dumps(response, default=str) + "\n")
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return latency_stats(latencies, feasible, time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Schedules many students' course selections (JSON lines) "
+                                                 "against one parsed schedule.")
+    parser.add_argument("--schedule", default="Transformed_Schedule_Cleaned.xlsx", help="Parsed schedule workbook")
+    parser.add_argument("--input", default=None, help="JSONL of requests, e.g. "
+                                                      '{"id": 1, "courses": {"Calculus": "Dr. X"}} (default: stdin)')
+    parser.add_argument("--output", default=None, help="JSONL of results (default: stdout)")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--chunksize", type=int, default=16)
+    parser.add_argument("--no-overlap", action="store_true",
+                        help="Keep each teacher to one section per time slot (see solve_schedule)")
+    parser.add_argument("--max-teacher-load", type=int, default=None, help="Weekly sessions per teacher")
+    args = parser.parse_args()
+
+    schedule = load_schedule(args.schedule)
+    source = open(args.input, encoding='utf-8') if args.input else sys.stdin
+    sink = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        stats = run_batch(schedule, source, sink.write, args.processes, args.chunksize,
+                          {'no_overlap': args.no_overlap, 'max_teacher_load': args.max_teacher_load})
+    finally:
+        if args.input:
+            source.close()
+        if args.output:
+            sink.close()
+    print(json.dumps(stats), file=sys.stderr)
@@ -0,0 +1,127 @@
+import argparse
+import json
+import time
+import numpy as np
+from typing import Dict, List
+from ann_index import ANN_BACKENDS, build_ann_index, hnswlib, load_ann_index, save_ann_index, top_k_indices
+from embedding_store import open_embedding_store
+from quantization import QUANTIZATION_KINDS, QuantizedVectors
+
+
+def synthetic_vectors(n_rows: int, dim: int, n_clusters: int = 200, noise: float = 0.35,
+                      seed: int = 0) -> np.ndarray:
+    """Unit vectors scattered around random cluster centres, roughly like course/section embeddings."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, n_clusters, n_rows)]
+    vectors += noise * rng.standard_normal((n_rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    """Fraction of the exact top-k that the approximate search also returned."""
+    hits = sum(len(set(f[f >= 0]) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def benchmark(vectors: np.ndarray, queries: np.ndarray, top_k: int, configs: Dict[str, Dict],
+              save_dir: str = None) -> List[Dict]:
+    """Builds each backend, times it, and measures recall@k against exact search."""
+    truth, _ = build_ann_index('exact', vectors).search(queries, top_k)
+    results = []
+    for kind, params in configs.items():
+        started = time.perf_counter()
+        index = build_ann_index(kind, vectors, **params)
+        build_seconds = time.perf_counter() - started
+        if save_dir is not None:
+            path = f"{save_dir}/ann_{kind}"
+            save_ann_index(index, path)
+            index = load_ann_index(path)
+        started = time.perf_counter()
+        found, _ = index.search(queries, top_k)
+        query_seconds = time.perf_counter() - started
+        results.append({
+            'backend': kind,
+            'params': index.params(),
+            'rows': len(vectors),
+            'build_s': round(build_seconds, 4),
+            'query_ms': round(query_seconds / len(queries) * 1000, 4),
+            f'recall@{top_k}': round(recall_at_k(found, truth), 4),
+            'memory_mb': round(index.memory_bytes() / 2 ** 20, 2)
+        })
+    return results
+
+
+def quantization_report(vectors: np.ndarray, queries: np.ndarray, top_k: int,
+                        rescore_factor: int = 4) -> List[Dict]:
+    """
+    Memory footprint and recall@k of each quantized mode relative to float32,
+    both on the quantized scores alone and after rescoring the top
+    rescore_factor * k candidates with full-precision vectors.
+    """
+    truth, _ = build_ann_index('exact', vectors).search(queries, top_k)
+    results = [{'backend': 'float32', 'rows': len(vectors), 'query_ms': None, f'recall@{top_k}': 1.0,
+                'memory_mb': round(vectors.astype(np.float32).nbytes / 2 ** 20, 2)}]
+    for kind in QUANTIZATION_KINDS:
+        quantized = QuantizedVectors.from_matrix(kind, vectors)
+        for rescore in (False, True):
+            started = time.perf_counter()
+            scores = quantized.score(queries)
+            if rescore:
+                candidates = top_k_indices(scores, top_k * rescore_factor)
+                exact = np.einsum('qd,qcd->qc', queries, vectors[candidates])
+                found = np.take_along_axis(candidates, top_k_indices(exact, top_k), axis=1)
+            else:
+                found = top_k_indices(scores, top_k)
+            query_seconds = time.perf_counter() - started
+            results.append({
+                'backend': f"{kind}+rescore" if rescore else kind,
+                'rows': len(vectors),
+                'query_ms': round(query_seconds / len(queries) * 1000, 4),
+                f'recall@{top_k}': round(recall_at_k(found, truth), 4),
+                'memory_mb': round(quantized.memory_bytes() / 2 ** 20, 2)
+            })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall, latency and memory of the ANN backends and "
+                                                 "quantized modes versus exact float32 search.")
+    parser.add_argument("--store", default=None, help="Benchmark on an embedding store instead of synthetic vectors")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--n-probe", type=int, default=8)
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    parser.add_argument("--save-dir", default=None, help="Also round-trip each index through save/load here")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON lines")
+    args = parser.parse_args()
+
+    if args.store is not None:
+        vectors = np.asarray(open_embedding_store(args.store).matrix, dtype=np.float32)
+    else:
+        vectors = synthetic_vectors(args.rows, args.dim)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.integers(0, len(vectors), args.queries)]
+    queries = queries + 0.1 * rng.standard_normal(queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    configs = {
+        'exact': {},
+        'ivf': {'n_probe': args.n_probe},
+        'ivfpq': {'n_probe': args.n_probe, 'n_subspaces': 48 if vectors.shape[1] % 48 == 0 else 1}
+    }
+    if hnswlib is not None:
+        configs['hnsw'] = {}
+    configs = {kind: params for kind, params in configs.items() if kind in ANN_BACKENDS}
+
+    results = benchmark(vectors, queries, args.top_k, configs, args.save_dir)
+    results += quantization_report(vectors, queries, args.top_k, args.rescore_factor)
+    for result in results:
+        if args.json:
+            print(json.dumps(result))
+        else:
+            build = f"build {result['build_s']:>8}s  " if 'build_s' in result else " " * 17
+            print(f"{result['backend']:>14}: {build}query {result['query_ms'] or '-':>8}ms  "
+                  f"recall@{args.top_k} {result[f'recall@{args.top_k}']:<6}  memory {result['memory_mb']}MB")
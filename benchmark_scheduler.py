@@ -0,0 +1,184 @@
+import argparse
+import json
+import random
+import time
+from typing import Any, Dict, List
+from ortools.sat.python import cp_model
+from backend import build_schedule_model, group_sessions, index_teacher_slots, intersect_group_candidates, solve_schedule
+
+# Synthetic instance shape per benchmark mode, unless given on the command line.
+FORMULATION_DEFAULTS = {'sections': [100, 500, 1000], 'sessions_per_section': 4, 'extra_availability': 0.3}
+CONSTRAINED_DEFAULTS = {'sections': [1000, 5000, 20000], 'sessions_per_section': 2, 'extra_availability': 0.15}
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+TIMES = ["8:30 AM to 9:45 AM", "10:00 AM to 11:15 AM", "11:30 AM to 12:45 PM",
+         "1:00 PM to 2:15 PM", "2:30 PM to 3:45 PM", "4:00 PM to 5:15 PM"]
+
+
+def synthetic_schedule(n_sections: int, n_teachers: int, sessions_per_section: int = 2,
+                       extra_availability: float = 0.3, seed: int = 0) -> Dict[str, List[Dict]]:
+    """
+    Random scheduler input shaped like the parsed registrar sheet: each section meets
+    sessions_per_section times a week at one time of day, its recorded teacher is its
+    preferred teacher, and teachers are also free in a share of the other slots.
+    """
+    rng = random.Random(seed)
+    courses = []
+    teacher_slots = [set() for _ in range(n_teachers)]
+    for s in range(n_sections):
+        name = f"Course {s // 3}"
+        days = rng.sample(DAYS, min(sessions_per_section, len(DAYS)))
+        time_of_day = rng.choice(TIMES)
+        teacher = rng.randrange(n_teachers)
+        for day in days:
+            slot = f"{day} {time_of_day}"
+            courses.append({
+                "id": f"{name}_{90000 + s}",
+                "name": name,
+                "preferred_teacher": f"Teacher {teacher}",
+                "time_slot": slot
+            })
+            teacher_slots[teacher].add(slot)
+    all_slots = [f"{day} {t}" for day in DAYS for t in TIMES]
+    for slots in teacher_slots:
+        slots.update(slot for slot in all_slots if rng.random() < extra_availability)
+    teachers = [{"id": f"Teacher {j}", "name": f"Teacher {j}", "available_slots": sorted(slots)}
+                for j, slots in enumerate(teacher_slots)]
+    return {"courses": courses, "teachers": teachers}
+
+
+def build_pairwise_model(courses: List[Dict], teachers: List[Dict]) -> cp_model.CpModel:
+    """
+    The previous formulation, kept as the baseline: one variable per (session, candidate
+    teacher) and an equality for every pair of sessions in a group, for every teacher.
+    """
+    model = cp_model.CpModel()
+    slot_teachers = index_teacher_slots(teachers)
+    candidates = {i: slot_teachers.get(c['time_slot'], []) for i, c in enumerate(courses)}
+    x = {}
+    for i, course in enumerate(courses):
+        for j in candidates[i]:
+            x[(i, j)] = model.NewBoolVar(f'x_{i}_{j}')
+        model.AddExactlyOne(x[(i, j)] for j in candidates[i])
+    for group in group_sessions(courses).values():
+        for idx1 in range(len(group)):
+            for idx2 in range(idx1 + 1, len(group)):
+                i1, i2 = group[idx1], group[idx2]
+                for j in set(candidates[i1]) | set(candidates[i2]):
+                    if (i1, j) in x and (i2, j) in x:
+                        model.Add(x[(i1, j)] == x[(i2, j)])
+                    else:
+                        model.Add(x.get((i1, j), x.get((i2, j))) == 0)
+    model.Maximize(sum(var for (i, j), var in x.items()
+                       if teachers[j]['name'] == courses[i]['preferred_teacher']))
+    return model
+
+
+def build_group_model(courses: List[Dict], teachers: List[Dict]) -> cp_model.CpModel:
+    """The current formulation from backend: one variable per (course group, candidate teacher)."""
+    slot_teachers = index_teacher_slots(teachers)
+    session_candidates = {i: slot_teachers.get(c['time_slot'], []) for i, c in enumerate(courses)}
+    course_groups = group_sessions(courses)
+    group_candidates = intersect_group_candidates(course_groups, session_candidates)
+    return build_schedule_model(courses, teachers, course_groups, group_candidates)['model']
+
+
+def measure(builder, data: Dict, max_time: float) -> Dict[str, Any]:
+    started = time.perf_counter()
+    model = builder(data['courses'], data['teachers'])
+    build_seconds = time.perf_counter() - started
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = max_time
+    started = time.perf_counter()
+    status = solver.Solve(model)
+    solve_seconds = time.perf_counter() - started
+    proto = model.Proto()
+    return {
+        'variables': len(proto.variables),
+        'constraints': len(proto.constraints),
+        'build_s': round(build_seconds, 4),
+        'solve_s': round(solve_seconds, 4),
+        'status': solver.StatusName(status),
+        'objective': solver.ObjectiveValue() if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) else None
+    }
+
+
+def measure_constrained(data: Dict, max_time: float, max_teacher_load: int, num_processes: int = 1,
+                        num_search_workers: int = 8) -> Dict[str, Any]:
+    """End-to-end solve_schedule with no-overlap and teaching-load constraints, checked for double bookings."""
+    started = time.perf_counter()
+    result = solve_schedule(data, max_time_in_seconds=max_time, num_search_workers=num_search_workers,
+                            no_overlap=True, max_teacher_load=max_teacher_load, num_processes=num_processes)
+    total_seconds = time.perf_counter() - started
+    booked = set()
+    double_booked = 0
+    for assignment in result.get('assignments', []):
+        key = (assignment['teacher'], assignment['time_slot'])
+        double_booked += key in booked
+        booked.add(key)
+    stats = result.get('solver_stats') or {}
+    return {
+        'total_s': round(total_seconds, 4),
+        'build_s': round(result['timings']['model_build'], 4),
+        'solve_s': round(result['timings']['solve'], 4),
+        'status': result.get('status', result.get('error')),
+        'solver_status': stats.get('status'),
+        'objective': sum(a['preferred'] for a in result.get('assignments', [])),
+        'double_booked': double_booked,
+        **result.get('fast_path', {})
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Model size and wall time of the scheduling formulations.")
+    parser.add_argument("--sections", type=int, nargs="+", default=None,
+                        help="Section counts to run (default: 100 500 1000, or 1000 5000 20000 with --constrained)")
+    parser.add_argument("--teachers-per-section", type=float, default=0.3)
+    parser.add_argument("--sessions-per-section", type=int, default=None,
+                        help="Weekly meetings per section (default: 4, or 2 with --constrained)")
+    parser.add_argument("--extra-availability", type=float, default=None,
+                        help="Share of other slots each teacher is also free in (default: 0.3, or 0.15 with --constrained)")
+    parser.add_argument("--max-time", type=float, default=60.0, help="Solver time limit per run (seconds)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON lines")
+    parser.add_argument("--constrained", action="store_true",
+                        help="Benchmark solve_schedule with no-overlap and teaching-load constraints instead")
+    parser.add_argument("--max-load", type=int, default=12, help="Weekly sessions per teacher (--constrained)")
+    parser.add_argument("--processes", type=int, default=1, help="Component solver processes (--constrained)")
+    parser.add_argument("--workers", type=int, default=8,
+                        help="CP-SAT search workers (--constrained); one worker lacks the LNS portfolio")
+    args = parser.parse_args()
+    # The constrained runs use larger, sparser instances: with 4 meetings a week, 30% extra
+    # availability and a load of 12, they are infeasible or time out, and below about
+    # 500 sections too few teachers share each slot for no-overlap to be satisfiable.
+    defaults = CONSTRAINED_DEFAULTS if args.constrained else FORMULATION_DEFAULTS
+    if args.sections is None:
+        args.sections = defaults['sections']
+    if args.sessions_per_section is None:
+        args.sessions_per_section = defaults['sessions_per_section']
+    if args.extra_availability is None:
+        args.extra_availability = defaults['extra_availability']
+
+    for n_sections in args.sections:
+        n_teachers = max(1, int(n_sections * args.teachers_per_section))
+        data = synthetic_schedule(n_sections, n_teachers, args.sessions_per_section, args.extra_availability)
+        if args.constrained:
+            result = dict(sections=n_sections, sessions=len(data['courses']), teachers=n_teachers,
+                          **measure_constrained(data, args.max_time, args.max_load, args.processes,
+                                                args.workers))
+            if args.json:
+                print(json.dumps(result))
+            else:
+                print(f"{n_sections:>6} sections: total {result['total_s']:>8}s  build {result['build_s']:>8}s  "
+                      f"solve {result['solve_s']:>8}s  direct {result.get('direct_groups')}  "
+                      f"via CP-SAT {result.get('solver_groups')} in {result.get('components')} components  "
+                      f"{result['status']} ({result['objective']})  double-booked {result['double_booked']}")
+            continue
+        for name, builder in (('pairwise', build_pairwise_model), ('group', build_group_model)):
+            result = dict(formulation=name, sections=n_sections, sessions=len(data['courses']),
+                          teachers=n_teachers, **measure(builder, data, args.max_time))
+            if args.json:
+                print(json.dumps(result))
+            else:
+                print(f"{n_sections:>6} sections {name:>8}: {result['variables']:>8} vars "
+                      f"{result['constraints']:>8} constraints  build {result['build_s']:>8}s  "
+                      f"solve {result['solve_s']:>8}s  {result['status']} ({result['objective']})")
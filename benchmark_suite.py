@@ -0,0 +1,262 @@
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from backend import build_schedule_model, group_sessions, solve_schedule
+from benchmark_ann import synthetic_vectors
+from name_index import NameIndex, normalize_name
+from Parsing import parse_excel_single_sheet, parse_schedule_frame
+from schedule_model import CompactSchedule
+from search_schedule import ScheduleSearchIndex
+
+SUITE_VERSION = 1
+
+# Day pairs and class timings as they appear on the registrar sheet (see uni_schedule_script).
+DAY_PAIRS = [['Monday', 'Wednesday'], ['Tuesday', 'Thursday'], ['Friday', 'Saturday']]
+TIMES = ["8:30 AM \nto \n9:45 AM", "10:00 AM \nto \n11:15 AM", "11:30 AM \nto \n12:45 PM",
+         "1:00 PM \nto \n2:15 PM", "2:30 PM \nto \n3:45 PM", "4:00 PM \nto \n5:15 PM",
+         "5:30 PM \nto \n6:45 PM"]
+PROGRAMS = ['BSCS', 'BSAF', 'BBA', 'BSEM', 'BSSS', 'MBA']
+TITLES = ['', '', '', 'Dr. ', 'Mr. ', 'Ms. ', 'Prof. ']
+SUBJECTS = ['Calculus', 'Data Structures', 'Financial Accounting', 'Microeconomics', 'Marketing',
+            'Operating Systems', 'Statistics', 'Linear Algebra', 'Business Ethics', 'Databases',
+            'Macroeconomics', 'Islamic Studies', 'Pakistan Studies', 'Discrete Mathematics',
+            'Computer Networks', 'Organizational Behaviour', 'Corporate Finance', 'Physics']
+LEVELS = ['I', 'II', 'III', 'Lab', 'Seminar']
+FIRST_NAMES = ['Ali', 'Sara', 'Imran', 'Asma', 'Ahmed', 'Rabia', 'Nasir', 'Humera', 'Kamran', 'Fatima',
+               'Usman', 'Ayesha', 'Bilal', 'Sana', 'Hassan', 'Zainab']
+LAST_NAMES = ['Khan', 'Ahmed', 'Siddiqui', 'Qureshi', 'Raza', 'Malik', 'Hussain', 'Shaikh', 'Iqbal', 'Jafri']
+
+
+def synthetic_session_sheet(n_sections: int, teacher_pool: Optional[int] = None, seed: int = 0,
+                            titles: bool = False) -> pd.DataFrame:
+    """
+    Seeded session sheet shaped like Transformed_Schedule_Cleaned.xlsx: one row per
+    session, each section meeting on one day pair at one time, taught by a teacher drawn
+    from a pool (default: a third of the sections, so teachers cover several sections).
+    Teachers are rarely given two sections at the same time. With titles, some teacher
+    names carry courtesy titles as on the uncleaned registrar sheet.
+    """
+    rng = random.Random(seed)
+    teacher_pool = teacher_pool or max(1, n_sections // 3)
+    n_courses = max(1, n_sections // 4)
+    courses = [f"{SUBJECTS[c % len(SUBJECTS)]} {LEVELS[(c // len(SUBJECTS)) % len(LEVELS)]}"
+               f"{'' if c < len(SUBJECTS) * len(LEVELS) else ' ' + str(c // (len(SUBJECTS) * len(LEVELS)))}"
+               for c in range(n_courses)]
+    teachers = [f"{FIRST_NAMES[t % len(FIRST_NAMES)]} {LAST_NAMES[(t // len(FIRST_NAMES)) % len(LAST_NAMES)]}"
+                f"{'' if t < len(FIRST_NAMES) * len(LAST_NAMES) else ' ' + str(t)}" for t in range(teacher_pool)]
+    rows, busy = [], set()
+    for s in range(n_sections):
+        course = rng.choice(courses)
+        program = f"{rng.choice(PROGRAMS)}-{rng.randint(1, 8)}"
+        days, time_of_day = rng.randrange(len(DAY_PAIRS)), rng.choice(TIMES)
+        # Prefer a teacher who is free at that time; after a few tries accept a clash
+        # (the sheet lists combined sections taught together the same way).
+        for _ in range(8):
+            teacher = rng.randrange(teacher_pool)
+            if (teacher, days, time_of_day) not in busy:
+                break
+        busy.add((teacher, days, time_of_day))
+        teacher = (rng.choice(TITLES) if titles else '') + teachers[teacher]
+        for day in DAY_PAIRS[days]:
+            rows.append({'Course Name': course, 'Program': program, 'Class Code': 90000 + s,
+                         'Day': day, 'Time': time_of_day, 'Teacher': teacher})
+    return pd.DataFrame(rows, columns=['Course Name', 'Program', 'Class Code', 'Day', 'Time', 'Teacher'])
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1 << 20 if sys.platform == 'darwin' else 1 << 10), 1)
+
+
+def timed(fn: Callable, *args, **kwargs) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, round(time.perf_counter() - started, 4)
+
+
+def latency_percentiles(latencies_ms: List[float]) -> Dict[str, float]:
+    ordered = np.asarray(latencies_ms, dtype=np.float64)
+    return {
+        'p50_ms': round(float(np.percentile(ordered, 50)), 4),
+        'p95_ms': round(float(np.percentile(ordered, 95)), 4),
+        'p99_ms': round(float(np.percentile(ordered, 99)), 4),
+        'max_ms': round(float(ordered.max()), 4)
+    }
+
+
+def benchmark_parse(sheet: pd.DataFrame, work_dir: str) -> Tuple[Dict, Dict[str, Any]]:
+    path = os.path.join(work_dir, 'schedule.xlsx')
+    sheet.to_excel(path, index=False)
+    data, excel_seconds = timed(parse_excel_single_sheet, path)
+    _, frame_seconds = timed(parse_schedule_frame, sheet)
+    return data, {'excel_s': excel_seconds, 'frame_s': frame_seconds, 'sessions': len(data['courses']),
+                  'teachers': len(data['teachers']), 'rss_peak_mb': peak_rss_mb()}
+
+
+def benchmark_model(data: Dict) -> Dict[str, Any]:
+    """Size and build time of the full CP-SAT model (every group in one model)."""
+    started = time.perf_counter()
+    course_groups = group_sessions(data['courses'])
+    compact = CompactSchedule.from_dict(data)
+    group_candidates = compact.group_candidates()
+    built = build_schedule_model(data['courses'], data['teachers'], course_groups, group_candidates)
+    build_seconds = time.perf_counter() - started
+    proto = built['model'].Proto()
+    return {'groups': len(course_groups), 'variables': len(proto.variables),
+            'constraints': len(proto.constraints), 'build_s': round(build_seconds, 4),
+            'rss_peak_mb': peak_rss_mb()}
+
+
+def benchmark_solve(data: Dict, max_time: float, no_overlap: bool = False) -> Dict[str, Any]:
+    result, seconds = timed(solve_schedule, data, max_time_in_seconds=max_time, no_overlap=no_overlap)
+    assignments = result.get('assignments', [])
+    stats = result.get('solver_stats') or {}
+    return {
+        'total_s': seconds,
+        'build_s': round(result['timings']['model_build'], 4),
+        'solve_s': round(result['timings']['solve'], 4),
+        'feasible': result['feasible'],
+        'status': result.get('status', result.get('error')),
+        'solver_status': stats.get('status', 'DIRECT' if result['feasible'] else None),
+        'preferred_share': round(sum(a['preferred'] for a in assignments) / len(assignments), 4) if assignments else None,
+        **result.get('fast_path', {}),
+        'rss_peak_mb': peak_rss_mb()
+    }
+
+
+def benchmark_search(sheet: pd.DataFrame, dim: int, n_queries: int, top_k: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    Latency of one-query searches over the session rows. Row embeddings are synthetic
+    (benchmark_ann.synthetic_vectors) so the numbers cover the index, not the encoder.
+    """
+    vectors, build_seconds = timed(synthetic_vectors, len(sheet), dim, seed=seed)
+    index, index_seconds = timed(ScheduleSearchIndex, sheet, vectors, normalized=True)
+    rng = np.random.default_rng(seed + 1)
+    queries = vectors[rng.integers(0, len(vectors), n_queries)]
+    queries = queries + 0.1 * rng.standard_normal(queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        index.search_vectors(query, top_k)
+        latencies.append((time.perf_counter() - started) * 1000)
+    _, batch_seconds = timed(index.search_vectors, queries, top_k)
+    return {'rows': len(sheet), 'dim': dim, 'queries': n_queries, 'index_build_s': round(build_seconds + index_seconds, 4),
+            **latency_percentiles(latencies), 'batch_ms_per_query': round(batch_seconds * 1000 / n_queries, 4),
+            'rss_peak_mb': peak_rss_mb()}
+
+
+def benchmark_name_lookup(data: Dict, n_queries: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    Latency of typo-tolerant teacher lookups (one character dropped from a real name);
+    a hit is a match that normalizes to the original name.
+    """
+    index, build_seconds = timed(NameIndex, (t['name'] for t in data['teachers']))
+    rng = random.Random(seed)
+    names = [t['name'] for t in data['teachers']]
+    latencies, found = [], 0
+    for _ in range(n_queries):
+        name = rng.choice(names)
+        cut = rng.randrange(len(name))
+        started = time.perf_counter()
+        match = index.best(name[:cut] + name[cut + 1:])
+        found += match is not None and normalize_name(match) == normalize_name(name)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return {'names': len(index), 'build_s': build_seconds, **latency_percentiles(latencies),
+            'hit_rate': round(found / n_queries, 4)}
+
+
+def run_suite(sections: List[int], seed: int = 0, max_time: float = 60.0, dim: int = 384,
+              n_queries: int = 200, top_k: int = 5, no_overlap: bool = False) -> Dict[str, Any]:
+    """Runs every benchmark at each scale; returns one JSON-serializable report."""
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for n_sections in sections:
+            sheet, generate_seconds = timed(synthetic_session_sheet, n_sections, seed=seed)
+            data, parse = benchmark_parse(sheet, work_dir)
+            results.append({
+                'sections': n_sections,
+                'generate_s': generate_seconds,
+                'parse': parse,
+                'model': benchmark_model(data),
+                'solve': benchmark_solve(data, max_time, no_overlap),
+                'search': benchmark_search(sheet, dim, n_queries, top_k, seed),
+                'name_lookup': benchmark_name_lookup(data, n_queries, seed)
+            })
+    return {
+        'suite_version': SUITE_VERSION,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'seed': seed,
+        'results': results
+    }
+
+
+# Absolute slack added to the relative tolerance, so that jitter on very short timings is not reported.
+MIN_SLOWDOWN = {'_s': 0.005, '_ms': 0.05}
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Timing and latency metrics ('_s' / '_ms') of current that are more than tolerance
+    (plus MIN_SLOWDOWN) slower than in baseline, matched by number of sections.
+    """
+    previous = {r['sections']: r for r in baseline.get('results', [])}
+    regressions = []
+    for result in current['results']:
+        before = previous.get(result['sections'])
+        if before is None:
+            continue
+        for section, metrics in result.items():
+            if not isinstance(metrics, dict) or not isinstance(before.get(section), dict):
+                continue
+            for metric, value in metrics.items():
+                old = before[section].get(metric)
+                unit = next((u for u in MIN_SLOWDOWN if metric.endswith(u)), None)
+                if unit is None or not isinstance(value, (int, float)) or not isinstance(old, (int, float)):
+                    continue
+                if value > old * (1 + tolerance) + MIN_SLOWDOWN[unit]:
+                    regressions.append(f"{result['sections']} sections: {section}.{metric} {old} -> {value}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse, model, solve, search and memory benchmarks on "
+                                                 "seeded synthetic schedules.")
+    parser.add_argument("--sections", type=int, nargs="+", default=[200, 1000, 5000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-time", type=float, default=60.0, help="Solver time limit per run (seconds)")
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension for the search benchmark")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--no-overlap", action="store_true", help="Solve with the no-overlap constraint")
+    parser.add_argument("--output", default=None, help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", default=None, help="Earlier JSON report to compare timings against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before a metric is "
+                                                                      "reported as a regression")
+    args = parser.parse_args()
+
+    report = run_suite(args.sections, args.seed, args.max_time, args.dim, args.queries, args.top_k, args.no_overlap)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare_reports(json.load(f), report, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
@@ -1,27 +1,67 @@
 import pandas as pd
 import re
+from name_index import TITLE_PATTERN, normalize_names, strip_titles
 
-# Load the Excel file
-file_path = "Transformed_Schedule_Final.xlsx"
-sheet_name = "Sheet1"  # Change if the sheet name is different
-
-# Read the Excel file
-df = pd.read_excel(file_path, sheet_name=sheet_name)
 
 # Function to remove courtesy titles
 def clean_teacher_name(name):
     if pd.notna(name):  # Ensure the name is not NaN
-        return re.sub(r"^(Dr\.|Prof\.|Mr\.|Ms\.|Mrs\.)\s*", "", name).strip()
+        return re.sub(r"\s+", " ", re.sub(TITLE_PATTERN, "", name)).strip()
     return name
 
-# Apply the cleaning function to the "Teacher" column
-if "Teacher" in df.columns:
-    df["Teacher"] = df["Teacher"].apply(clean_teacher_name)
-else:
-    print("Column 'Teacher' not found in the dataset.")
 
-# Save the cleaned data to a new Excel file
-output_file = "Transformed_Schedule_Cleaned.xlsx"
-df.to_excel(output_file, index=False)
+def casing_rank(names: pd.Series) -> pd.Series:
+    """
+    How properly cased each spelling is, higher is better: 0 when all lowercase, 1 when
+    all uppercase, else 2 plus the number of capitalized words ("Ghias ul Hassan Khan"
+    ranks above "Ghias ul hassan khan").
+    """
+    capitals = names.str.count(r"(?:^|\s)[A-Z]")
+    rank = (2 + capitals).where(names.ne(names.str.upper()), 1)
+    return rank.where(names.ne(names.str.lower()), 0)
+
+
+def remove_courtesy_titles(df: pd.DataFrame, column: str = "Teacher") -> pd.DataFrame:
+    """
+    Returns a copy of df with courtesy titles removed from the teacher column, and
+    spellings that differ only in case, punctuation or spacing ("Ali Khan", "ali  khan",
+    "Dr. Ali Khan") merged into one: the best cased spelling (see casing_rank), then
+    the most frequent. Works on the whole column with pandas string methods rather
+    than a per-row apply.
+    """
+    if column not in df.columns:
+        raise ValueError(f"Column '{column}' not found in the dataset.")
+    df = df.copy()
+    names = df[column].astype(object)
+    text = names.notna() & names.map(type).eq(str)
+    cleaned = strip_titles(names[text])
+    keys = normalize_names(cleaned)
+    # Best cased, then most frequent, spelling of each normalized name (ties: first seen).
+    spellings = pd.DataFrame({'key': keys, 'name': cleaned})
+    counts = spellings.groupby(['key', 'name'], sort=False).size().reset_index(name='n')
+    counts['casing'] = casing_rank(counts['name'])
+    canonical = counts.sort_values(['casing', 'n'], ascending=False, kind='stable').drop_duplicates('key')
+    names[text] = keys.map(canonical.set_index('key')['name'])
+    df[column] = names
+    return df
+
+
+if __name__ == "__main__":
+    # Load the Excel file
+    file_path = "Transformed_Schedule_Final.xlsx"
+    sheet_name = "Sheet1"  # Change if the sheet name is different
+
+    # Read the Excel file
+    df = pd.read_excel(file_path, sheet_name=sheet_name)
+
+    # Remove courtesy titles from the "Teacher" column
+    if "Teacher" in df.columns:
+        df = remove_courtesy_titles(df)
+    else:
+        print("Column 'Teacher' not found in the dataset.")
+
+    # Save the cleaned data to a new Excel file
+    output_file = "Transformed_Schedule_Cleaned.xlsx"
+    df.to_excel(output_file, index=False)
 
-print(f"Courtesy titles removed. Cleaned file saved as '{output_file}'.")
+    print(f"Courtesy titles removed. Cleaned file saved as '{output_file}'.")
@@ -0,0 +1,104 @@
+import numpy as np
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from sentence_transformers import SentenceTransformer
+from embedding_store import EmbeddingStore, EmbeddingStoreWriter, context_hash, open_embedding_store
+
+# Rows of reused vectors copied from the previous store per write.
+COPY_BLOCK_ROWS = 65536
+
+
+def open_reusable_store(store_path: str, model_name: Optional[str]) -> Optional[EmbeddingStore]:
+    """
+    Opens the existing store if its vectors can be reused: it must have been
+    written by the same model and carry context hashes.
+    """
+    try:
+        store = open_embedding_store(store_path)
+    except FileNotFoundError:
+        return None
+    if store.hashes is None or store.meta.get('model') != model_name:
+        return None
+    return store
+
+
+def iter_encoded_chunks(texts: List[str], model: SentenceTransformer, batch_size: int = 64,
+                        chunk_size: int = 4096, num_processes: int = 1) -> Iterator[Tuple[List[int], np.ndarray]]:
+    """
+    Encodes texts and yields (positions, vectors) one chunk at a time.
+    Texts are sorted by length first so each batch pads to similar lengths.
+    With num_processes > 1 each chunk is fanned out over a sentence-transformers
+    multi-process pool of that many CPU workers.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+    pool = None
+    if num_processes > 1 and order:
+        pool = model.start_multi_process_pool(['cpu'] * num_processes)
+    try:
+        for start in range(0, len(order), chunk_size):
+            positions = order[start:start + chunk_size]
+            chunk = [texts[i] for i in positions]
+            if pool is not None:
+                vectors = model.encode_multi_process(chunk, pool, batch_size=batch_size)
+            else:
+                vectors = model.encode(chunk, batch_size=batch_size, convert_to_numpy=True)
+            yield positions, np.asarray(vectors, dtype=np.float32)
+    finally:
+        if pool is not None:
+            model.stop_multi_process_pool(pool)
+
+
+def generate_embedding_store(texts: List[str], row_ids: List[Any], model: SentenceTransformer,
+                             store_path: str, model_name: Optional[str] = None,
+                             incremental: bool = True, batch_size: int = 64,
+                             chunk_size: int = 4096, num_processes: int = 1,
+                             quantizations: Sequence[str] = ()) -> Dict[str, int]:
+    """
+    Encodes the context strings and streams them into the embedding store at store_path.
+    In incremental mode, rows whose context hash is already in the existing store reuse
+    the stored vector, and only new or changed contexts are encoded (each distinct
+    context once). Encoded chunks are written to disk as they finish, so memory stays
+    bounded by chunk_size. Quantized copies ('int8', 'binary') are added to the store for
+    each kind in quantizations. Returns counts of reused and computed rows.
+    """
+    texts = [str(t) for t in texts]
+    hashes = [context_hash(t) for t in texts]
+    previous = open_reusable_store(store_path, model_name) if incremental else None
+    previous_rows = {h: i for i, h in enumerate(previous.hashes)} if previous is not None else {}
+
+    # Split rows into those copied from the previous store and distinct contexts to encode;
+    # repeated rows (e.g. Mon/Wed sessions) share one encode.
+    reused_positions, reused_sources = [], []
+    pending_rows: Dict[str, List[int]] = {}
+    for position, h in enumerate(hashes):
+        if h in previous_rows:
+            reused_positions.append(position)
+            reused_sources.append(previous_rows[h])
+        else:
+            pending_rows.setdefault(h, []).append(position)
+
+    dim = previous.dim if previous is not None else model.get_sentence_embedding_dimension()
+    with EmbeddingStoreWriter(store_path, row_ids, dim, model_name=model_name, hashes=hashes,
+                              quantizations=quantizations) as writer:
+        for start in range(0, len(reused_positions), COPY_BLOCK_ROWS):
+            sources = reused_sources[start:start + COPY_BLOCK_ROWS]
+            writer.write(reused_positions[start:start + COPY_BLOCK_ROWS], previous.matrix[sources])
+
+        pending_hashes = list(pending_rows)
+        pending_texts = [texts[pending_rows[h][0]] for h in pending_hashes]
+        for chunk_positions, vectors in iter_encoded_chunks(pending_texts, model, batch_size=batch_size,
+                                                            chunk_size=chunk_size, num_processes=num_processes):
+            positions, sources = [], []
+            for offset, k in enumerate(chunk_positions):
+                rows = pending_rows[pending_hashes[k]]
+                positions.extend(rows)
+                sources.extend([offset] * len(rows))
+            writer.write(positions, vectors[sources])
+        writer.close()
+
+    computed = len(texts) - len(reused_positions)
+    return {
+        'rows': len(texts),
+        'reused': len(reused_positions),
+        'computed': computed,
+        'encoded': len(pending_rows)
+    }
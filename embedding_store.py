@@ -0,0 +1,220 @@
+import hashlib
+import json
+import os
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence
+from quantization import QUANTIZATION_KINDS, QuantizedVectors, int8_scale, quantize_binary, quantize_int8
+
+STORE_FORMAT_VERSION = 1
+
+# Rows per block when deriving quantized copies of a written matrix.
+QUANTIZE_BLOCK_ROWS = 65536
+
+
+def store_paths(store_path: str) -> Dict[str, str]:
+    """
+    Maps a store prefix to its files.
+    A store is a matrix file ('<prefix>.npy') plus a row-id sidecar ('<prefix>.rows.json'),
+    and optionally quantized copies of the matrix ('<prefix>.int8.npy', '<prefix>.binary.npy').
+    """
+    if store_path.endswith('.npy'):
+        store_path = store_path[:-4]
+    return {
+        'matrix': f"{store_path}.npy",
+        'rows': f"{store_path}.rows.json",
+        'int8': f"{store_path}.int8.npy",
+        'int8_scale': f"{store_path}.int8_scale.npy",
+        'binary': f"{store_path}.binary.npy"
+    }
+
+
+class EmbeddingStore:
+    """
+    An opened embedding store.
+    'matrix' is memory-mapped read-only, so opening a store does not copy the vectors.
+    'row_ids' gives the schedule row each matrix row belongs to, and 'hashes'
+    (when present) the content hash of the context each vector was encoded from.
+    """
+
+    def __init__(self, matrix: np.ndarray, row_ids: List[Any], meta: Dict[str, Any],
+                 hashes: Optional[List[str]] = None, path: Optional[str] = None):
+        self.path = path
+        self.matrix = matrix
+        self.row_ids = row_ids
+        self.meta = meta
+        self.hashes = hashes
+
+    def __len__(self) -> int:
+        return len(self.row_ids)
+
+    @property
+    def dim(self) -> int:
+        return self.matrix.shape[1]
+
+    @property
+    def normalized(self) -> bool:
+        return bool(self.meta.get('normalized', False))
+
+    def quantized(self, kind: str) -> QuantizedVectors:
+        """
+        Opens the store's quantized copy ('int8' or 'binary') memory-mapped, or
+        computes it from the matrix if the store was written without it.
+        """
+        if kind not in self.meta.get('quantizations', []):
+            return QuantizedVectors.from_matrix(kind, self.matrix)
+        paths = store_paths(self.path)
+        codes = np.load(paths[kind], mmap_mode='r')
+        scale = np.load(paths['int8_scale']) if kind == 'int8' else None
+        return QuantizedVectors(kind, codes, self.dim, scale)
+
+
+class EmbeddingStoreWriter:
+    """
+    Streams vectors into a new store without holding the whole matrix in memory.
+    The matrix is preallocated as a memory-mapped .npy file and rows are written
+    at their final positions as they arrive, in any order. Nothing replaces the
+    existing store until close() succeeds. Quantized copies ('int8', 'binary') are
+    derived from the finished matrix on close.
+    """
+
+    def __init__(self, store_path: str, row_ids: List[Any], dim: int,
+                 model_name: Optional[str] = None, dtype=np.float16,
+                 normalize: bool = True, hashes: Optional[List[str]] = None,
+                 quantizations: Sequence[str] = ()):
+        if hashes is not None and len(hashes) != len(row_ids):
+            raise ValueError(f"Row count mismatch: {len(hashes)} hashes vs {len(row_ids)} row ids")
+        unknown = [q for q in quantizations if q not in QUANTIZATION_KINDS]
+        if unknown:
+            raise ValueError(f"Unknown quantization(s): {unknown}")
+        self.quantizations = list(quantizations)
+        self.paths = store_paths(store_path)
+        self.row_ids = row_ids
+        self.hashes = hashes
+        self.model_name = model_name
+        self.dtype = np.dtype(dtype)
+        self.normalize = normalize
+        # Written to temporary files and swapped in on close, so readers that still
+        # have the previous matrix memory-mapped keep a valid file.
+        self._matrix = np.lib.format.open_memmap(self.paths['matrix'] + '.tmp', mode='w+',
+                                                 dtype=self.dtype, shape=(len(row_ids), dim))
+
+    def write(self, positions, vectors: np.ndarray):
+        """Writes vectors into the given row positions of the store."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self._matrix.shape[1]:
+            raise ValueError(f"Expected vectors of shape (n, {self._matrix.shape[1]}), got {vectors.shape}")
+        if self.normalize:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            vectors = vectors / norms
+        self._matrix[np.asarray(positions, dtype=np.int64)] = vectors.astype(self.dtype)
+
+    def close(self) -> Dict[str, str]:
+        """Flushes the matrix, writes the sidecar and replaces any previous store. Returns the paths."""
+        self._matrix.flush()
+        dim = int(self._matrix.shape[1])
+        written = [self._write_quantized(kind) for kind in self.quantizations]
+        del self._matrix
+        meta = {
+            'format_version': STORE_FORMAT_VERSION,
+            'model': self.model_name,
+            'dim': dim,
+            'dtype': self.dtype.name,
+            'normalized': self.normalize,
+            'row_ids': [_jsonable(r) for r in self.row_ids],
+            'hashes': list(self.hashes) if self.hashes is not None else None,
+            'quantizations': self.quantizations
+        }
+        with open(self.paths['rows'] + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        for key in ['matrix'] + [key for keys in written for key in keys]:
+            os.replace(self.paths[key] + '.tmp', self.paths[key])
+        os.replace(self.paths['rows'] + '.tmp', self.paths['rows'])
+        return self.paths
+
+    def _write_quantized(self, kind: str) -> List[str]:
+        """Writes a quantized copy of the matrix block by block; returns the path keys written."""
+        n_rows, dim = self._matrix.shape
+        if kind == 'int8':
+            scale = int8_scale(self._matrix)
+            with open(self.paths['int8_scale'] + '.tmp', 'wb') as f:
+                np.save(f, scale)
+            out = np.lib.format.open_memmap(self.paths['int8'] + '.tmp', mode='w+', dtype=np.int8,
+                                            shape=(n_rows, dim))
+        else:
+            scale = None
+            out = np.lib.format.open_memmap(self.paths['binary'] + '.tmp', mode='w+', dtype=np.uint8,
+                                            shape=(n_rows, (dim + 7) // 8))
+        for start in range(0, n_rows, QUANTIZE_BLOCK_ROWS):
+            block = self._matrix[start:start + QUANTIZE_BLOCK_ROWS]
+            out[start:start + len(block)] = quantize_int8(block, scale)[0] if kind == 'int8' else quantize_binary(block)
+        out.flush()
+        del out
+        return ['int8', 'int8_scale'] if kind == 'int8' else ['binary']
+
+    def abort(self):
+        """Discards the partially written store."""
+        if hasattr(self, '_matrix'):
+            del self._matrix
+        for path in self.paths.values():
+            path = path + '.tmp'
+            if os.path.exists(path):
+                os.remove(path)
+
+    def __enter__(self) -> "EmbeddingStoreWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+
+
+def write_embedding_store(store_path: str, embeddings: np.ndarray, row_ids: List[Any],
+                          model_name: Optional[str] = None, dtype=np.float16,
+                          normalize: bool = True, hashes: Optional[List[str]] = None,
+                          quantizations: Sequence[str] = ()) -> Dict[str, str]:
+    """
+    Writes embeddings as a binary .npy matrix (float16 by default) plus a JSON sidecar
+    holding the row ids, optional content hashes and store metadata. Rows are
+    L2-normalized before writing unless normalize is False, and quantized copies
+    are added for each kind in quantizations. Returns the paths written.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if embeddings.ndim != 2:
+        raise ValueError(f"Expected a 2-D embedding matrix, got shape {embeddings.shape}")
+    if len(row_ids) != len(embeddings):
+        raise ValueError(f"Row count mismatch: {len(row_ids)} row ids vs {len(embeddings)} embeddings")
+    with EmbeddingStoreWriter(store_path, row_ids, embeddings.shape[1], model_name=model_name,
+                              dtype=dtype, normalize=normalize, hashes=hashes,
+                              quantizations=quantizations) as writer:
+        writer.write(np.arange(len(embeddings)), embeddings)
+        return writer.close()
+
+
+def open_embedding_store(store_path: str) -> EmbeddingStore:
+    """Opens a store written by write_embedding_store, memory-mapping the matrix."""
+    paths = store_paths(store_path)
+    if not os.path.exists(paths['matrix']) or not os.path.exists(paths['rows']):
+        raise FileNotFoundError(f"Embedding store not found at '{store_path}'")
+    with open(paths['rows'], encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('format_version') != STORE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported embedding store version: {meta.get('format_version')}")
+    matrix = np.load(paths['matrix'], mmap_mode='r')
+    row_ids = meta.pop('row_ids')
+    hashes = meta.pop('hashes', None)
+    if len(row_ids) != matrix.shape[0]:
+        raise ValueError(f"Corrupt embedding store: {len(row_ids)} row ids vs {matrix.shape[0]} vectors")
+    return EmbeddingStore(matrix, row_ids, meta, hashes, store_path)
+
+
+def context_hash(text: str) -> str:
+    """Content hash of a context string, used to decide whether its vector can be reused."""
+    return hashlib.sha1(str(text).encode('utf-8')).hexdigest()
+
+
+def _jsonable(value: Any) -> Any:
+    """Converts numpy scalars (e.g. DataFrame index values) into plain JSON types."""
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
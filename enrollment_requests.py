@@ -0,0 +1,315 @@
+import argparse
+import copy
+import json
+import re
+import sys
+import time
+import pandas as pd
+from typing import Any, Dict, List, Optional, Tuple
+from backend import index_teacher_slots, solve_schedule
+from batch_schedule import latency_stats
+from name_index import NameIndex, normalize_name
+from Parsing import ParsedSchedule, load_schedule
+from query_cache import LRUCache, QueryEmbeddingCache
+from search_schedule import ScheduleSearchIndex
+
+# Start hour ranges [from, to) of the time-of-day words a request may use.
+TIME_WINDOWS = {'morning': (0, 12), 'afternoon': (12, 17), 'evening': (17, 24)}
+
+# Similarity a course name must reach to be taken from the name index without retrieval.
+COURSE_NAME_SIMILARITY = 0.75
+
+# Retrieval results below this cosine similarity leave the clause unresolved.
+MIN_RETRIEVAL_SIMILARITY = 0.3
+
+# Rows retrieved per clause; the best scoring course among them is used.
+RETRIEVAL_TOP_K = 5
+
+# Queries per batched encode.
+SEARCH_BATCH_SIZE = 256
+
+CLAUSE_SEPARATOR = re.compile(r"\s*(?:,|;|&|\+|\band\b|\balso\b)\s*", re.IGNORECASE)
+TEACHER_PATTERN = re.compile(r"\b(?:taught by|with|by|under|from)\s+(.+?)\s*$", re.IGNORECASE)
+WINDOW_PATTERN = re.compile(r"\b(?:in the\s+|during the\s+)?(morning|afternoon|evening)s?\b", re.IGNORECASE)
+FILLER_PATTERN = re.compile(r"^(?:(?:i|we)\s+(?:want|need|would like|'d like)\s+(?:to\s+)?|please\s+|"
+                            r"(?:enroll|register)\s+(?:me\s+)?(?:in|for)\s+|take\s+|study\s+)+", re.IGNORECASE)
+SLOT_START_PATTERN = re.compile(r"(\d{1,2}):(\d{2})\s*([AP]M)", re.IGNORECASE)
+
+
+def slot_start_hour(time_slot: str) -> Optional[float]:
+    """Start time of a slot such as 'Monday 8:30 AM \\nto \\n9:45 AM', in hours after midnight."""
+    match = SLOT_START_PATTERN.search(time_slot)
+    if match is None:
+        return None
+    hour, minute, meridiem = int(match.group(1)) % 12, int(match.group(2)), match.group(3).upper()
+    return hour + (12 if meridiem == 'PM' else 0) + minute / 60
+
+
+def in_window(time_slot: str, window: str) -> bool:
+    start, end = TIME_WINDOWS[window]
+    hour = slot_start_hour(time_slot)
+    return hour is not None and start <= hour < end
+
+
+def parse_clause(text: str) -> Dict[str, Optional[str]]:
+    """Splits one clause ('DSA with Ahmed in the morning') into course text, teacher text and time window."""
+    window = WINDOW_PATTERN.search(text)
+    text = WINDOW_PATTERN.sub(" ", text)
+    teacher = TEACHER_PATTERN.search(text)
+    if teacher is not None:
+        text = text[:teacher.start()]
+    course = FILLER_PATTERN.sub("", re.sub(r"\s+", " ", text).strip()).strip(" .!?")
+    return {'course_text': course,
+            'teacher_text': teacher.group(1).strip(" .!?") if teacher is not None else None,
+            'window': window.group(1).lower() if window is not None else None}
+
+
+def split_request(text: str, schedule: ParsedSchedule) -> List[Dict[str, Optional[str]]]:
+    """
+    Splits a free-text request into one clause per course. Pieces separated by 'and' are
+    joined back when together they name a course ('Information Security and Ethics').
+    """
+    pieces = [p for p in CLAUSE_SEPARATOR.split(str(text)) if p and p.strip()]
+    clauses, i = [], 0
+    while i < len(pieces):
+        j = i + 1
+        for end in range(len(pieces), i + 1, -1):
+            # Only the last piece of a joined course name may name a teacher or a time.
+            if any(TEACHER_PATTERN.search(p) or WINDOW_PATTERN.search(p) for p in pieces[i:end - 1]):
+                continue
+            joined = parse_clause(" and ".join(pieces[i:end]))
+            if schedule.course_index.lookup(joined['course_text'], 1, COURSE_NAME_SIMILARITY):
+                j = end
+                break
+        clause = parse_clause(" and ".join(pieces[i:j]))
+        if clause['course_text']:
+            clauses.append(clause)
+        elif clause['teacher_text'] and clauses and clauses[-1]['teacher_text'] is None:
+            clauses[-1]['teacher_text'] = clause['teacher_text']  # "Calculus, with Dr. Ali"
+        i = j
+    return clauses
+
+
+def match_course_teacher(schedule: ParsedSchedule, course: str, teacher_text: str) -> Optional[str]:
+    """
+    The teacher of course that teacher_text names: a teacher of the course whose name
+    contains every typed word, else the closest of the course's teachers. None when
+    nobody teaching the course matches.
+    """
+    options = schedule.teacher_options(course)
+    words = set(normalize_name(teacher_text).split())
+    if not words:
+        return None
+    containing = [t for t in options if words <= set(normalize_name(t).split())]
+    if len(containing) == 1:
+        return containing[0]
+    return NameIndex(containing or options).best(teacher_text, min_similarity=MIN_RETRIEVAL_SIMILARITY)
+
+
+class SolvedScheduleCache(LRUCache):
+    """
+    Bounded LRU cache of solve_schedule results keyed on the canonical request: the sorted
+    (course, preferred teacher, time window) tuples. Students asking for the same courses
+    and teachers share one solve. Results are copied in and out, so callers may edit them.
+    """
+
+    def get(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        result = super().get(key)
+        return None if result is None else copy.deepcopy(result)
+
+    def put(self, key: Tuple, result: Dict[str, Any]):
+        super().put(key, copy.deepcopy(result))
+
+
+class EnrollmentResolver:
+    """
+    Turns free-text enrollment requests into schedules: each request is split into course
+    clauses, course names are matched by name or retrieved from the search index (all
+    clauses of a batch in one encode), teachers are matched among the course's teachers,
+    and the resulting preferences are solved once per canonical request.
+    """
+
+    def __init__(self, schedule: ParsedSchedule, index: ScheduleSearchIndex, top_k: int = RETRIEVAL_TOP_K,
+                 cache_size: int = 10000):
+        self.schedule = schedule
+        self.index = index
+        self.top_k = top_k
+        self.slot_teachers = index_teacher_slots(schedule.teachers)
+        self.solved = SolvedScheduleCache(cache_size)
+
+    def retrieve_courses(self, queries: List[str]) -> List[Optional[Tuple[str, float]]]:
+        """Best schedule course (name, similarity) retrieved for each query, or None."""
+        matches = []
+        for start in range(0, len(queries), SEARCH_BATCH_SIZE):
+            for rows in self.index.search_many(queries[start:start + SEARCH_BATCH_SIZE], self.top_k):
+                match = None
+                for name, similarity in zip(rows['Course Name'], rows['similarity']):
+                    course = self.schedule.match_course(str(name))
+                    if course is not None and similarity >= MIN_RETRIEVAL_SIMILARITY:
+                        match = (course, round(float(similarity), 4))
+                        break
+                matches.append(match)
+        return matches
+
+    def resolve(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Maps each request text onto {course: preferred teacher} plus time windows. Clauses
+        whose course names are not recognized directly are retrieved together.
+        """
+        resolutions = []
+        pending: List[Dict] = []
+        for text in texts:
+            clauses = split_request(text, self.schedule)
+            for clause in clauses:
+                named = self.schedule.course_index.lookup(clause['course_text'], 1, COURSE_NAME_SIMILARITY)
+                if named:
+                    clause['course'], clause['match'] = named[0][0], {'by': 'name', 'similarity': named[0][1]}
+                else:
+                    pending.append(clause)
+            resolutions.append({'text': text, 'clauses': clauses})
+        retrieved = self.retrieve_courses([clause['course_text'] for clause in pending]) if pending else []
+        for clause, match in zip(pending, retrieved):
+            if match is not None:
+                clause['course'], clause['match'] = match[0], {'by': 'retrieval', 'similarity': match[1]}
+
+        for resolution in resolutions:
+            preferences, windows, unresolved, matches, unmatched_teachers = {}, {}, [], [], []
+            for clause in resolution.pop('clauses'):
+                course = clause.get('course')
+                if course is None:
+                    unresolved.append(clause['course_text'])
+                    continue
+                # A teacher nobody teaching the course matches is reported, not imposed.
+                teacher = None
+                if clause['teacher_text']:
+                    teacher = match_course_teacher(self.schedule, course, clause['teacher_text'])
+                    if teacher is None:
+                        unmatched_teachers.append(clause['teacher_text'])
+                preferences[course.lower()] = teacher
+                if clause['window']:
+                    windows[course.lower()] = clause['window']
+                matches.append({'text': clause['course_text'], 'course': course, 'teacher': teacher,
+                                'window': clause['window'], **clause['match']})
+            resolution.update(matches=matches, preferences=preferences, windows=windows, unresolved=unresolved,
+                              unmatched_teachers=unmatched_teachers)
+        return resolutions
+
+    def schedule_data(self, preferences: Dict[str, Optional[str]], windows: Dict[str, str]) -> Tuple[Dict, List[str]]:
+        """
+        Sessions of the preferred courses, narrowed to the sections the student asked for:
+        with a named teacher, the sections that teacher is free to teach; with a time
+        window, those meeting entirely within it. A filter that would leave a course with
+        no sections is not applied; unmet time windows are returned in the list.
+        """
+        data = self.schedule.filter_courses(preferences)
+        sections: Dict[str, List[Dict]] = {}
+        for course in data['courses']:
+            sections.setdefault(course['id'], []).append(course)
+        unmet = []
+        for name, teacher in preferences.items():
+            ids = [i for i, sessions in sections.items() if sessions[0]['name'].strip().lower() == name]
+            if teacher:
+                free = self.schedule.teacher_slots.get(teacher, set())
+                ids = [i for i in ids if all(s['time_slot'] in free for s in sections[i])] or ids
+            if name in windows:
+                within = [i for i in ids if all(in_window(s['time_slot'], windows[name]) for s in sections[i])]
+                if not within:
+                    unmet.append(name)
+                ids = within or ids
+            for i in [i for i, sessions in sections.items() if sessions[0]['name'].strip().lower() == name]:
+                if i not in ids:
+                    del sections[i]
+        courses = [course for course in data['courses'] if course['id'] in sections]
+        return {'courses': courses, 'teachers': data['teachers']}, unmet
+
+    def solve(self, preferences: Dict[str, Optional[str]], windows: Dict[str, str]) -> Dict[str, Any]:
+        """solve_schedule for the resolved preferences, memoized on the canonical request."""
+        key = tuple(sorted((course, teacher or '', windows.get(course, '')) for course, teacher in preferences.items()))
+        result = self.solved.get(key)
+        if result is not None:
+            result['memoized'] = True
+            return result
+        data, unmet = self.schedule_data(preferences, windows)
+        result = solve_schedule(data, slot_teachers=self.slot_teachers)
+        if unmet:
+            result['time_preference_unmet'] = unmet
+        self.solved.put(key, result)
+        result['memoized'] = False
+        return result
+
+    def handle_batch(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Resolves a batch of {'request_id', 'text'} requests together, then solves each."""
+        started = time.perf_counter()
+        resolutions = self.resolve([str(request.get('text', '')) for request in requests])
+        resolve_ms = (time.perf_counter() - started) * 1000 / max(1, len(requests))
+        responses = []
+        for request, resolution in zip(requests, resolutions):
+            solve_started = time.perf_counter()
+            response = {'request_id': request.get('request_id', request.get('id')), **resolution}
+            if resolution['preferences']:
+                response.update(self.solve(resolution['preferences'], resolution['windows']))
+            else:
+                response.update(feasible=False, error='No courses recognized in the request', conflicts=[])
+            response['latency_ms'] = round(resolve_ms + (time.perf_counter() - solve_started) * 1000, 3)
+            responses.append(response)
+        return responses
+
+
+def read_requests(lines) -> List[Dict[str, Any]]:
+    """JSON-lines requests with a 'text' (or 'request'/'query') field; a bare line is taken as the text."""
+    requests = []
+    for n, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError:
+            request = {'text': line.strip()}
+        if not isinstance(request, dict):
+            request = {'text': str(request)}
+        request.setdefault('text', request.get('request', request.get('query', request.get('body', ''))))
+        request.setdefault('request_id', request.get('id', n + 1))
+        requests.append(request)
+    return requests
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Schedules free-text enrollment requests (JSON lines): "
+                                                 "retrieval maps them onto courses and teachers, then each "
+                                                 "distinct request is solved once.")
+    parser.add_argument("--schedule", default="Transformed_Schedule_Cleaned.xlsx", help="Parsed schedule workbook")
+    parser.add_argument("--search-sheet", default="Updated_Schedule.xlsx", help="Schedule sheet with a 'context' column")
+    parser.add_argument("--store", default="Updated_Schedule_embeddings", help="Embedding store path")
+    parser.add_argument("--input", default=None, help='JSONL of requests, e.g. {"id": 1, "text": "DSA with Ahmed '
+                                                      'and Calculus in the morning"} (default: stdin)')
+    parser.add_argument("--output", default=None, help="JSONL of results (default: stdout)")
+    parser.add_argument("--batch-size", type=int, default=256, help="Requests resolved per batch")
+    parser.add_argument("--top-k", type=int, default=RETRIEVAL_TOP_K)
+    parser.add_argument("--query-cache", default=None, help="Persist the query embedding cache to this .npz file")
+    args = parser.parse_args()
+
+    schedule = load_schedule(args.schedule)
+    index = ScheduleSearchIndex.from_store(pd.read_excel(args.search_sheet), args.store)
+    index.query_cache = QueryEmbeddingCache(path=args.query_cache)
+    resolver = EnrollmentResolver(schedule, index, top_k=args.top_k)
+
+    source = open(args.input, encoding='utf-8') if args.input else sys.stdin
+    sink = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    started = time.perf_counter()
+    latencies, feasible = [], 0
+    try:
+        requests = read_requests(source)
+        for start in range(0, len(requests), args.batch_size):
+            for response in resolver.handle_batch(requests[start:start + args.batch_size]):
+                latencies.append(response['latency_ms'])
+                feasible += bool(response.get('feasible'))
+                sink.write(json.dumps(response, default=str) + "\n")
+    finally:
+        if args.input:
+            source.close()
+        if args.output:
+            sink.close()
+    if args.query_cache is not None:
+        index.query_cache.save()
+    stats = latency_stats(latencies, feasible, time.perf_counter() - started)
+    print(json.dumps({**stats, 'solve_cache': resolver.solved.stats()}), file=sys.stderr)
@@ -1,38 +1,45 @@
 import pandas as pd
 from sentence_transformers import SentenceTransformer
+from embedding_pipeline import generate_embedding_store
 
-# Define the file path to the cleaned schedule
-file_path = "Updated_Schedule.xlsx"
+MODEL_NAME = 'all-MiniLM-L6-v2'
 
-# Load the dataset into a DataFrame
-df = pd.read_excel(file_path)
+# Encoding settings: rows per forward pass, rows streamed to disk per chunk, and
+# CPU worker processes (1 disables the multi-process pool).
+BATCH_SIZE = 64
+CHUNK_SIZE = 4096
+NUM_PROCESSES = 1
 
+# Quantized copies written next to the float16 matrix for fast first-pass search.
+QUANTIZATIONS = ('int8', 'binary')
 
-# Load the pre-trained transformer model
-model = SentenceTransformer('all-MiniLM-L6-v2')
+# The multi-process pool re-imports this module in its workers, so the script body
+# must only run under __main__.
+if __name__ == "__main__":
+    # Define the file path to the cleaned schedule
+    file_path = "Updated_Schedule.xlsx"
 
+    # Load the dataset into a DataFrame
+    df = pd.read_excel(file_path)
 
-# Check if the 'context' column is in the dataset
-if 'context' not in df.columns:
-    raise ValueError("Error: 'context' column not found in dataset!")
+    # Load the pre-trained transformer model
+    model = SentenceTransformer(MODEL_NAME)
 
+    # Check if the 'context' column is in the dataset
+    if 'context' not in df.columns:
+        raise ValueError("Error: 'context' column not found in dataset!")
 
-# Generate embeddings for each row
-df['embeddings'] = df['context'].apply(lambda x: model.encode(x).tolist())
+    # Define the save path. The store is a float16 .npy matrix plus a .rows.json sidecar
+    # mapping each vector back to its row in the schedule sheet.
+    store_path = "Updated_Schedule_embeddings"
 
+    # Generate embeddings, reusing vectors for contexts already in the store
+    incremental = True
+    stats = generate_embedding_store(df['context'].tolist(), df.index.tolist(), model, store_path,
+                                     model_name=MODEL_NAME, incremental=incremental,
+                                     batch_size=BATCH_SIZE, chunk_size=CHUNK_SIZE,
+                                     num_processes=NUM_PROCESSES, quantizations=QUANTIZATIONS)
 
-print("Generated Embeddings:")
-print(df[['context', 'embeddings']].head())
-
-# Save the DataFrame with embeddings
-#df.to_excel("Schedule_with_Embeddings.xlsx", index=False)
-#print("Embeddings saved successfully in Schedule_with_Embeddings.xlsx")
-
-# Define the save path
-save_path = r"C:\Users\afnan baba\Desktop\MOOSA\mohib umair moosa project\Updated_Schedule_with_Embeddings.xlsx"
-
-# Save the DataFrame with embeddings
-df.to_excel(save_path, index=False)
-
-print(f"File saved successfully at: {save_path}")
-
+    print(f"Generated Embeddings: {stats['rows']} rows "
+          f"({stats['reused']} reused, {stats['computed']} computed from {stats['encoded']} distinct contexts)")
+    print(f"Embedding store saved successfully at: {store_path}")
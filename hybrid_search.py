@@ -0,0 +1,176 @@
+import re
+import numpy as np
+import pandas as pd
+from collections import Counter
+from typing import Dict, List
+from search_schedule import ScheduleSearchIndex
+
+# Schedule columns with an inverted index used for structured pre-filtering.
+FILTER_COLUMNS = ['Day', 'Teacher', 'Class Code', 'Program']
+
+DAY_ALIASES = {
+    'monday': 'monday', 'mon': 'monday',
+    'tuesday': 'tuesday', 'tue': 'tuesday', 'tues': 'tuesday',
+    'wednesday': 'wednesday', 'wed': 'wednesday',
+    'thursday': 'thursday', 'thu': 'thursday', 'thur': 'thursday', 'thurs': 'thursday',
+    'friday': 'friday', 'fri': 'friday',
+    'saturday': 'saturday', 'sat': 'saturday'
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9]+", str(text).lower())
+
+
+def filter_key(column: str, value) -> str:
+    """
+    Normalized key for an inverted-index value.
+    Programs ignore spacing and dashes ('BSAF - 4' == 'BSAF-4' == 'bsaf4').
+    """
+    if column == 'Program':
+        return "".join(tokenize(value))
+    if column == 'Class Code':
+        value = str(value)
+        return value[:-2] if value.endswith('.0') else value
+    return " ".join(tokenize(value))
+
+
+class BM25:
+    """Okapi BM25 over a fixed list of documents, with postings kept as numpy arrays."""
+
+    def __init__(self, documents: List[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.n_docs = len(documents)
+        doc_tokens = [tokenize(d) for d in documents]
+        self.doc_lengths = np.array([len(t) for t in doc_tokens], dtype=np.float32)
+        avg_length = float(self.doc_lengths.mean()) if self.n_docs else 0.0
+        self._norm = k1 * (1 - b + b * self.doc_lengths / (avg_length or 1.0))
+
+        postings: Dict[str, List] = {}
+        for doc_id, tokens in enumerate(doc_tokens):
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, []).append((doc_id, tf))
+        self.postings = {}
+        for term, entries in postings.items():
+            docs = np.array([d for d, _ in entries], dtype=np.int64)
+            tfs = np.array([tf for _, tf in entries], dtype=np.float32)
+            idf = np.log(1 + (self.n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            self.postings[term] = (docs, tfs, idf)
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for the query."""
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for term in set(tokenize(query)):
+            if term not in self.postings:
+                continue
+            docs, tfs, idf = self.postings[term]
+            scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + self._norm[docs])
+        return scores
+
+
+def _min_max(values: np.ndarray) -> np.ndarray:
+    if len(values) == 0:
+        return values
+    low, high = values.min(), values.max()
+    if high - low <= 1e-12:
+        return np.ones_like(values) if high > 0 else np.zeros_like(values)
+    return (values - low) / (high - low)
+
+
+class HybridRetriever:
+    """
+    Hybrid schedule retrieval.
+    Exact mentions of a day, teacher, class code or program in the query narrow the
+    candidate rows through inverted indexes; the survivors are scored with BM25 over
+    'context' and cosine similarity, fused as alpha * dense + (1 - alpha) * lexical.
+    """
+
+    def __init__(self, index: ScheduleSearchIndex, alpha: float = 0.7):
+        self.index = index
+        self.df = index.df
+        self.alpha = alpha
+        self.bm25 = BM25(self.df['context'].astype(str).tolist())
+        self.inverted: Dict[str, Dict[str, np.ndarray]] = {}
+        for column in FILTER_COLUMNS:
+            if column not in self.df.columns:
+                continue
+            keys = self.df[column].map(lambda v: filter_key(column, v) if pd.notna(v) else "")
+            groups = pd.Series(np.arange(len(self.df))).groupby(keys.values).apply(np.asarray)
+            self.inverted[column] = {key: rows for key, rows in groups.items() if key}
+        # Teacher names are matched as phrases, longest first so full names win over parts.
+        self._teacher_keys = sorted(self.inverted.get('Teacher', {}), key=len, reverse=True)
+
+    def extract_filters(self, query: str) -> Dict[str, List[str]]:
+        """Finds the filter values named in the query, as inverted-index keys per column."""
+        tokens = tokenize(query)
+        filters: Dict[str, List[str]] = {}
+        days = sorted({DAY_ALIASES[t] for t in tokens if t in DAY_ALIASES})
+        if days and 'Day' in self.inverted:
+            filters['Day'] = [d for d in days if d in self.inverted['Day']]
+        codes = [t for t in tokens if t.isdigit() and t in self.inverted.get('Class Code', {})]
+        if codes:
+            filters['Class Code'] = codes
+        # 'BSCS-8' or 'bscs 8' in a query tokenizes to adjacent tokens; join runs of up to three.
+        spans = {"".join(tokens[i:i + n]) for n in (1, 2, 3) for i in range(len(tokens) - n + 1)}
+        programs = sorted(p for p in spans if p in self.inverted.get('Program', {}) and not p.isdigit())
+        if programs:
+            filters['Program'] = programs
+        phrase = f" {' '.join(tokens)} "
+        teachers = []
+        for key in self._teacher_keys:
+            if f" {key} " in phrase and not any(key in t for t in teachers):
+                teachers.append(key)
+        if teachers:
+            filters['Teacher'] = teachers
+        return {column: values for column, values in filters.items() if values}
+
+    def candidate_rows(self, filters: Dict[str, List[str]]) -> np.ndarray:
+        """
+        Rows matching any value within a column and every filtered column.
+        If the columns contradict each other, falls back to rows matching any filter,
+        and to all rows when there are no filters.
+        """
+        if not filters:
+            return np.arange(len(self.df))
+        per_column = [np.unique(np.concatenate([self.inverted[column][v] for v in values]))
+                      for column, values in filters.items()]
+        rows = per_column[0]
+        for matched in per_column[1:]:
+            rows = np.intersect1d(rows, matched, assume_unique=True)
+        if len(rows) == 0:
+            rows = np.unique(np.concatenate(per_column))
+        return rows
+
+    def search_many(self, queries: List[str], top_k: int = 5) -> List[pd.DataFrame]:
+        """Answers several queries; all dense query vectors come from one batched encode."""
+        query_vectors = self.index.encode_queries(queries)
+        results = []
+        for query, vector in zip(queries, query_vectors):
+            rows = self.candidate_rows(self.extract_filters(query))
+            dense = self.index.score_rows(vector, rows)[0]
+            lexical = self.bm25.scores(query)[rows]
+            fused = self.alpha * _min_max(dense) + (1 - self.alpha) * _min_max(lexical)
+            k = min(top_k, len(rows))
+            best = np.argpartition(-fused, k - 1)[:k] if k else np.empty(0, dtype=np.int64)
+            best = best[np.argsort(-fused[best])]
+            result = self.df.iloc[rows[best]].copy()
+            result['similarity'] = dense[best]
+            result['bm25'] = lexical[best]
+            result['score'] = fused[best]
+            results.append(result)
+        return results
+
+    def search(self, query: str, top_k: int = 5) -> pd.DataFrame:
+        """Returns the top_k rows for a query with 'similarity', 'bm25' and fused 'score' columns."""
+        return self.search_many([query], top_k)[0]
+
+
+if __name__ == "__main__":
+    file_path = "Updated_Schedule.xlsx"
+    store_path = "Updated_Schedule_embeddings"
+    retriever = HybridRetriever(ScheduleSearchIndex.from_store(pd.read_excel(file_path), store_path))
+
+    query = "Data Structures on Monday with Sadaf Alvi"
+    print("Filters:", retriever.extract_filters(query))
+    print("\nTop Matching Results:\n", retriever.search(query, top_k=5)[['context', 'Day', 'score']])
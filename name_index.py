@@ -0,0 +1,90 @@
+import re
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Courtesy titles at the start of a name, with or without the dot ("Dr. ", "dr ", "Prof.").
+TITLE_PATTERN = r"(?i)^\s*(?:(?:dr|prof|mrs|mr|ms)(?:\.\s*|\s+))+"
+
+# Default Dice similarity (over character trigrams) a fuzzy match must reach.
+MIN_SIMILARITY = 0.5
+
+
+def strip_titles(names: pd.Series) -> pd.Series:
+    """Removes leading courtesy titles and collapses whitespace, keeping the original case."""
+    return (names.astype(str).str.replace(TITLE_PATTERN, "", regex=True)
+            .str.replace(r"\s+", " ", regex=True).str.strip())
+
+
+def normalize_names(names: pd.Series) -> pd.Series:
+    """Lookup keys for a column of names: no titles, lowercase, punctuation as spaces, single spaces."""
+    return (strip_titles(names).str.lower().str.replace(r"[^\w\s]", " ", regex=True)
+            .str.replace(r"\s+", " ", regex=True).str.strip())
+
+
+def normalize_name(name: str) -> str:
+    """normalize_names for a single name."""
+    name = re.sub(TITLE_PATTERN, "", str(name))
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", name.lower())).strip()
+
+
+def trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """
+    Typo-tolerant lookup of names (teachers or course titles). Names are normalized
+    once (normalize_names) and each distinct key is posted under its character
+    trigrams, so a query only scores the keys sharing a trigram with it. Scores are the
+    Dice coefficient of the trigram sets; an exact key match scores 1.0.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        names = pd.Series([n for n in names if isinstance(n, str) and n.strip()], dtype=object)
+        self.keys: List[str] = []
+        self.names: List[List[str]] = []  # original spellings of each key, in first-seen order
+        self.key_ids: Dict[str, int] = {}
+        self.sizes: List[int] = []
+        self.postings: Dict[str, List[int]] = {}
+        for name, key in zip(names.tolist(), normalize_names(names).tolist()):
+            k = self.key_ids.get(key)
+            if k is None:
+                k = self.key_ids[key] = len(self.keys)
+                self.keys.append(key)
+                self.names.append([])
+                grams = trigrams(key)
+                self.sizes.append(len(grams))
+                for gram in grams:
+                    self.postings.setdefault(gram, []).append(k)
+            if name not in self.names[k]:
+                self.names[k].append(name)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def lookup(self, query: str, limit: int = 5, min_similarity: float = MIN_SIMILARITY) -> List[Tuple[str, float]]:
+        """Best matching names for query as (name, similarity), most similar first."""
+        key = normalize_name(query)
+        if not key:
+            return []
+        k = self.key_ids.get(key)
+        if k is not None:
+            return [(self.names[k][0], 1.0)]
+        grams = trigrams(key)
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            for k in self.postings.get(gram, ()):
+                shared[k] = shared.get(k, 0) + 1
+        scored = []
+        for k, count in shared.items():
+            similarity = 2.0 * count / (len(grams) + self.sizes[k])
+            if similarity >= min_similarity:
+                scored.append((similarity, k))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [(self.names[k][0], round(similarity, 4)) for similarity, k in scored[:limit]]
+
+    def best(self, query: str, min_similarity: float = MIN_SIMILARITY) -> Optional[str]:
+        """The most similar name, or None when nothing reaches min_similarity."""
+        matches = self.lookup(query, limit=1, min_similarity=min_similarity)
+        return matches[0][0] if matches else None
@@ -0,0 +1,88 @@
+import numpy as np
+from typing import Optional, Tuple
+
+QUANTIZATION_KINDS = ('int8', 'binary')
+
+# Rows scored per block, to bound the temporary float32 copy of the codes.
+SCORE_BLOCK_ROWS = 65536
+
+# Number of set bits in each byte value, for Hamming distances on packed sign bits.
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    # numpy >= 2.0 has a native popcount; older versions use the lookup table.
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    return POPCOUNT[values]
+
+
+def int8_scale(matrix: np.ndarray) -> np.ndarray:
+    """Per-dimension scale mapping the largest absolute value of each dimension to 127."""
+    absmax = np.zeros(matrix.shape[1], dtype=np.float32)
+    for start in range(0, len(matrix), SCORE_BLOCK_ROWS):
+        block = np.abs(np.asarray(matrix[start:start + SCORE_BLOCK_ROWS], dtype=np.float32))
+        if len(block):
+            absmax = np.maximum(absmax, block.max(axis=0))
+    absmax[absmax == 0] = 1.0
+    return absmax / 127.0
+
+
+def quantize_int8(matrix: np.ndarray, scale: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric scalar quantization: returns (int8 codes, per-dimension float32 scale)."""
+    if scale is None:
+        scale = int8_scale(matrix)
+    codes = np.clip(np.rint(np.asarray(matrix, dtype=np.float32) / scale), -127, 127).astype(np.int8)
+    return codes, scale
+
+
+def quantize_binary(matrix: np.ndarray) -> np.ndarray:
+    """Keeps only the sign of each dimension, packed 8 dimensions per byte."""
+    return np.packbits(np.asarray(matrix) > 0, axis=1)
+
+
+class QuantizedVectors:
+    """
+    A reduced-precision copy of the row embeddings used for a fast first pass.
+    'int8' approximates inner products from scalar-quantized codes; 'binary' ranks by
+    Hamming distance between sign bits (higher score = fewer differing bits).
+    """
+
+    def __init__(self, kind: str, codes: np.ndarray, dim: int, scale: Optional[np.ndarray] = None):
+        if kind not in QUANTIZATION_KINDS:
+            raise ValueError(f"Unknown quantization '{kind}'. Choose from: {', '.join(QUANTIZATION_KINDS)}")
+        self.kind = kind
+        self.codes = codes
+        self.dim = dim
+        self.scale = scale
+
+    @classmethod
+    def from_matrix(cls, kind: str, matrix: np.ndarray) -> "QuantizedVectors":
+        if kind == 'int8':
+            codes, scale = quantize_int8(matrix)
+            return cls(kind, codes, matrix.shape[1], scale)
+        return cls(kind, quantize_binary(matrix), matrix.shape[1])
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def memory_bytes(self) -> int:
+        return int(self.codes.nbytes + (self.scale.nbytes if self.scale is not None else 0))
+
+    def score(self, query_vectors: np.ndarray) -> np.ndarray:
+        """Approximate scores of shape (Q, N) for float query vectors against every row."""
+        query_vectors = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+        scores = np.empty((len(query_vectors), len(self.codes)), dtype=np.float32)
+        if self.kind == 'int8':
+            scaled = query_vectors * self.scale
+            for start in range(0, len(self.codes), SCORE_BLOCK_ROWS):
+                block = np.asarray(self.codes[start:start + SCORE_BLOCK_ROWS], dtype=np.float32)
+                scores[:, start:start + len(block)] = scaled @ block.T
+        else:
+            query_bits = quantize_binary(query_vectors)
+            for start in range(0, len(self.codes), SCORE_BLOCK_ROWS):
+                block = np.asarray(self.codes[start:start + SCORE_BLOCK_ROWS])
+                for q, bits in enumerate(query_bits):
+                    hamming = _popcount(np.bitwise_xor(block, bits)).sum(axis=1, dtype=np.int32)
+                    scores[q, start:start + len(block)] = self.dim - 2 * hamming
+        return scores
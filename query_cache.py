@@ -0,0 +1,112 @@
+import os
+import re
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+
+def normalize_query(query: str) -> str:
+    """Cache key for a query: lowercased with whitespace collapsed."""
+    return re.sub(r"\s+", " ", str(query)).strip().lower()
+
+
+class LRUCache:
+    """Bounded least-recently-used cache with hit and miss counts."""
+
+    def __init__(self, max_size: int = 10000):
+        if max_size < 1:
+            raise ValueError(f"max_size must be at least 1, got {max_size}")
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def cache_key(self, key: Hashable) -> Hashable:
+        """The key entries are stored under; subclasses normalize here."""
+        return key
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        key = self.cache_key(key)
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        key = self.cache_key(key)
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+
+class QueryEmbeddingCache(LRUCache):
+    """
+    Bounded LRU cache of query embeddings keyed on normalized query text.
+    It can be saved to and loaded from an .npz file so hot queries survive restarts.
+    """
+
+    def __init__(self, max_size: int = 10000, path: Optional[str] = None):
+        super().__init__(max_size)
+        self.path = path
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def cache_key(self, query: str) -> str:
+        return normalize_query(query)
+
+    def put(self, query: str, vector: np.ndarray):
+        super().put(query, np.asarray(vector, dtype=np.float32))
+
+    def encode(self, queries: List[str], encode_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Returns embeddings for queries, calling encode_fn only on the distinct misses
+        (in one batch) and caching what it returns. No queries give an empty
+        (0, dim) array, dim taken from the cached vectors.
+        """
+        if not queries:
+            dim = len(next(iter(self._entries.values()))) if self._entries else 0
+            return np.empty((0, dim), dtype=np.float32)
+        vectors: List[Optional[np.ndarray]] = [self.get(q) for q in queries]
+        missing: Dict[str, List[int]] = {}
+        for i, (query, vector) in enumerate(zip(queries, vectors)):
+            if vector is None:
+                missing.setdefault(normalize_query(query), []).append(i)
+        if missing:
+            encoded = encode_fn([queries[positions[0]] for positions in missing.values()])
+            for (key, positions), vector in zip(missing.items(), encoded):
+                self.put(key, vector)
+                for i in positions:
+                    vectors[i] = self._entries[key]
+        return np.stack(vectors)
+
+    def save(self, path: Optional[str] = None):
+        """Writes the cache, least recently used first, so a reload keeps the LRU order."""
+        path = path or self.path
+        if path is None:
+            raise ValueError("No path given for saving the query cache")
+        keys = list(self._entries)
+        vectors = np.stack(list(self._entries.values())) if keys else np.empty((0, 0), dtype=np.float32)
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, keys=np.array(keys, dtype=str), vectors=vectors)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str):
+        with np.load(path, allow_pickle=False) as data:
+            for key, vector in zip(data['keys'].tolist(), data['vectors']):
+                self.put(key, vector)
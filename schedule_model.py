@@ -0,0 +1,254 @@
+import numpy as np
+from typing import Dict, Iterator, List, Optional
+
+# Fields held in dedicated attributes; any others on a course or teacher dict are kept as extras.
+SESSION_FIELDS = ('id', 'name', 'preferred_teacher', 'time_slot')
+TEACHER_FIELDS = ('id', 'name', 'available_slots')
+
+
+class Interner:
+    """Maps strings to dense integer ids (in first-seen order) and back."""
+
+    __slots__ = ('ids', 'names')
+
+    def __init__(self, names: Optional[List[str]] = None):
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+        for name in names or ():
+            self.intern(name)
+
+    def intern(self, name: str) -> int:
+        i = self.ids.get(name)
+        if i is None:
+            i = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return i
+
+    def name(self, i: int) -> str:
+        return self.names[i]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+class OverlayInterner(Interner):
+    """
+    An Interner over a shared base that it never modifies: names the base already had
+    keep their ids, and new ones are numbered after the base's (as it was when the
+    overlay was made) and held only here.
+    """
+
+    __slots__ = ('base', 'offset')
+
+    def __init__(self, base: Interner):
+        super().__init__()
+        self.base = base
+        self.offset = len(base)
+
+    def intern(self, name: str) -> int:
+        i = self.base.ids.get(name)
+        if i is not None and i < self.offset:
+            return i
+        i = self.ids.get(name)
+        if i is None:
+            i = self.ids[name] = self.offset + len(self.names)
+            self.names.append(name)
+        return i
+
+    def name(self, i: int) -> str:
+        return self.base.names[i] if i < self.offset else self.names[i - self.offset]
+
+    def __len__(self) -> int:
+        return self.offset + len(self.names)
+
+
+class Session:
+    """One weekly meeting of a section, as interned ids."""
+
+    __slots__ = ('group', 'course', 'slot', 'preferred', 'extra')
+
+    def __init__(self, group: int, course: int, slot: int, preferred: int, extra: Optional[Dict] = None):
+        self.group = group          # course id ("Course Name_Class Code"), i.e. the section
+        self.course = course        # course name
+        self.slot = slot            # time slot
+        self.preferred = preferred  # preferred teacher, in the teacher name table
+        self.extra = extra          # other fields of the source dict (e.g. 'enrolled'), or None
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Positions of the set bits of mask, in increasing order."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def bit_positions(mask: int) -> List[int]:
+    """Same as list(iter_bits(mask)), unpacked by numpy for wide masks."""
+    if mask < 1 << 64:
+        return list(iter_bits(mask))
+    packed = np.frombuffer(mask.to_bytes((mask.bit_length() + 7) // 8, 'little'), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(packed, bitorder='little')).tolist()
+
+
+class CompactSchedule:
+    """
+    Scheduler input with interned ids instead of strings. Teachers are indices into
+    teacher_names (input order), time slots, course names and course ids (sections) each
+    have an Interner, sessions are __slots__ records, and availability is kept as
+    bitsets: teacher_slots[j] has bit s set when teacher j is free in slot s, and
+    slot_teachers[s] is its transpose, so the teachers free at every session of a section
+    are the AND of its slots' masks.
+
+    Preferred teachers are ids in `names`, which also holds names that are not teachers;
+    name_teachers[p] is the bitset of teacher indices called names.name(p) (0 for those,
+    and ids past its end are names no teacher has).
+    from_dict/to_dict convert to and from the {"courses", "teachers"} dict form; the
+    teacher dicts are built once and shared by every select() of a schedule.
+    """
+
+    def __init__(self, teacher_names: List[str], teacher_ids: List[str], teacher_slots: List[int],
+                 teacher_extra: List[Optional[Dict]], slots: Interner, courses: Interner, groups: Interner,
+                 names: Interner, name_teachers: List[int], sessions: List[Session],
+                 slot_teachers: Optional[List[int]] = None, teachers: Optional[List[Dict]] = None):
+        self.teacher_names = teacher_names
+        self.teacher_ids = teacher_ids
+        self.teacher_slots = teacher_slots
+        self.teacher_extra = teacher_extra
+        self.slots = slots
+        self.courses = courses
+        self.groups = groups
+        self.names = names
+        self.name_teachers = name_teachers
+        self.sessions = sessions
+        if slot_teachers is None:
+            slot_teachers = [0] * len(slots)
+            for j, mask in enumerate(teacher_slots):
+                for s in iter_bits(mask):
+                    slot_teachers[s] |= 1 << j
+        self.slot_teachers = slot_teachers
+        self._teachers = teachers
+        self._dict: Optional[Dict[str, List[Dict]]] = None
+        self._sessions_by_name: Optional[Dict[str, List[Session]]] = None
+
+    @property
+    def n_teachers(self) -> int:
+        return len(self.teacher_names)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "CompactSchedule":
+        """Interns the dict form (as parse_excel_single_sheet returns)."""
+        slots, names = Interner(), Interner()
+        teacher_names, teacher_ids, teacher_slots, teacher_extra, name_teachers = [], [], [], [], []
+        for j, teacher in enumerate(data['teachers']):
+            teacher_names.append(teacher['name'])
+            teacher_ids.append(teacher['id'])
+            mask = 0
+            for slot in teacher['available_slots']:
+                mask |= 1 << slots.intern(slot)
+            teacher_slots.append(mask)
+            extra = {k: v for k, v in teacher.items() if k not in TEACHER_FIELDS}
+            teacher_extra.append(extra or None)
+            p = names.intern(teacher['name'])
+            if p == len(name_teachers):
+                name_teachers.append(0)
+            name_teachers[p] |= 1 << j
+        schedule = cls(teacher_names, teacher_ids, teacher_slots, teacher_extra, slots, Interner(),
+                       Interner(), names, name_teachers, [])
+        for course in data['courses']:
+            extra = {k: v for k, v in course.items() if k not in SESSION_FIELDS}
+            schedule.sessions.append(Session(schedule.groups.intern(course['id']),
+                                             schedule.courses.intern(course['name']),
+                                             schedule.slot_id(course['time_slot']),
+                                             schedule.name_id(course['preferred_teacher']), extra or None))
+        return schedule
+
+    def slot_id(self, slot: str) -> int:
+        s = self.slots.intern(slot)
+        if s == len(self.slot_teachers):
+            self.slot_teachers.append(0)  # a slot no teacher is free in
+        return s
+
+    def name_id(self, name: str) -> int:
+        p = self.names.intern(name)
+        if p == len(self.name_teachers):
+            self.name_teachers.append(0)
+        return p
+
+    def teacher_dicts(self) -> List[Dict]:
+        """The "teachers" list of the dict form, built once and reused."""
+        if self._teachers is None:
+            self._teachers = []
+            for j, name in enumerate(self.teacher_names):
+                teacher = {'id': self.teacher_ids[j], 'name': name,
+                           'available_slots': [self.slots.names[s] for s in bit_positions(self.teacher_slots[j])]}
+                if self.teacher_extra[j]:
+                    teacher.update(self.teacher_extra[j])
+                self._teachers.append(teacher)
+        return self._teachers
+
+    def to_dict(self) -> Dict[str, List[Dict]]:
+        """The dict form, built once and reused."""
+        if self._dict is None:
+            courses = []
+            for session in self.sessions:
+                course = {
+                    'id': self.groups.names[session.group],
+                    'name': self.courses.names[session.course],
+                    'preferred_teacher': self.names.name(session.preferred),
+                    'time_slot': self.slots.names[session.slot]
+                }
+                if session.extra:
+                    course.update(session.extra)
+                courses.append(course)
+            self._dict = {'courses': courses, 'teachers': self.teacher_dicts()}
+        return self._dict
+
+    def is_available(self, teacher: int, slot: int) -> bool:
+        return bool(self.teacher_slots[teacher] >> slot & 1)
+
+    def group_masks(self) -> Dict[int, int]:
+        """Bitset of the teachers free at every session of each section, by group id."""
+        masks = {}
+        for session in self.sessions:
+            mask = self.slot_teachers[session.slot]
+            masks[session.group] = masks[session.group] & mask if session.group in masks else mask
+        return masks
+
+    def group_candidates(self, masks: Optional[Dict[int, int]] = None) -> Dict[str, List[int]]:
+        """Sorted candidate teacher indices by course id, as backend.intersect_group_candidates."""
+        masks = self.group_masks() if masks is None else masks
+        return {self.groups.names[g]: bit_positions(mask) for g, mask in masks.items()}
+
+    def available_preferred(self, masks: Optional[Dict[int, int]] = None) -> Dict[str, set]:
+        """Preferred teacher names of each course id that can teach all of its sessions."""
+        masks = self.group_masks() if masks is None else masks
+        available = {self.groups.names[g]: set() for g in masks}
+        for session in self.sessions:
+            p = session.preferred
+            if p < len(self.name_teachers) and self.name_teachers[p] & masks[session.group]:
+                available[self.groups.names[session.group]].add(self.names.name(p))
+        return available
+
+    def select(self, selected_courses: Dict[str, Optional[str]]) -> "CompactSchedule":
+        """
+        The sessions of the selected courses (lowercased name -> preferred teacher, None to
+        keep each session's own), in the order of ParsedSchedule.filter_courses. The result
+        shares this schedule's tables, availability bitsets and teacher dicts; preferred
+        teachers not already in its name table go in one of the selection's own.
+        """
+        if self._sessions_by_name is None:
+            self._sessions_by_name = {}
+            for session in self.sessions:
+                name = self.courses.names[session.course].strip().lower()
+                self._sessions_by_name.setdefault(name, []).append(session)
+        names, sessions = OverlayInterner(self.names), []
+        for name, teacher in selected_courses.items():
+            matching = self._sessions_by_name.get(name.strip().lower(), [])
+            if teacher:
+                p = names.intern(teacher.strip())
+                matching = [Session(s.group, s.course, s.slot, p, s.extra) for s in matching]
+            sessions.extend(matching)
+        return CompactSchedule(self.teacher_names, self.teacher_ids, self.teacher_slots, self.teacher_extra,
+                               self.slots, self.courses, self.groups, names, self.name_teachers, sessions,
+                               self.slot_teachers, self.teacher_dicts())
@@ -0,0 +1,223 @@
+import argparse
+import hashlib
+import os
+import time
+import numpy as np
+import pandas as pd
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sentence_transformers import SentenceTransformer
+from courtesy_title_removal import remove_courtesy_titles
+from embedding_pipeline import generate_embedding_store, open_reusable_store
+from embedding_store import context_hash
+from Parsing import file_hash
+from search_schedule import ScheduleSearchIndex
+from uni_schedule_script import transform_schedule
+
+PIPELINE_CACHE_DIR = ".pipeline_cache"
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# Version of the cached frame layout; bump to invalidate every cached stage.
+FRAME_FORMAT_VERSION = 2
+
+# Version of the registrar sheet reader; bump when read_registrar changes.
+REGISTRAR_STAGE_VERSION = 1
+
+
+def add_context(df: pd.DataFrame) -> pd.DataFrame:
+    """Adds the 'context' string each session is embedded from."""
+    df = df.copy()
+    df['context'] = df['Course Name'].astype(str) + " | Faculty: " + df['Teacher'].fillna('').astype(str)
+    return df
+
+
+# (name, version, stage) in order; each stage maps the previous stage's DataFrame to a new one.
+# Bump a stage's version when its output changes, so it is recomputed (and every later stage
+# whose input changes as a result).
+PIPELINE_STAGES: List[Tuple[str, int, Callable[[pd.DataFrame], pd.DataFrame]]] = [
+    ('transform', 1, transform_schedule),
+    ('clean', 3, remove_courtesy_titles),
+    ('context', 1, add_context),
+]
+
+
+def read_registrar(file_path: str, sheet_name: str = 'Sheet1', header: int = 1) -> pd.DataFrame:
+    """The registrar sheet as read by uni_schedule_script (the second row is the header)."""
+    return pd.read_excel(file_path, sheet_name=sheet_name, header=[header])
+
+
+def stage_key(input_hash: str, name: str, version: int) -> str:
+    """Cache key of a stage's output: the content hash of its input with the stage name and version."""
+    return hashlib.sha1(f"{FRAME_FORMAT_VERSION}:{input_hash}:{name}:{version}".encode('utf-8')).hexdigest()
+
+
+def stage_cache_path(cache_dir: str, name: str, key: str) -> str:
+    return os.path.join(cache_dir, f"{name}-{key[:16]}.npz")
+
+
+def frame_hash(df: pd.DataFrame) -> str:
+    """SHA-1 of a DataFrame's columns, dtypes, index and values."""
+    digest = hashlib.sha1()
+    digest.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def write_frame(df: pd.DataFrame, path: str, content_hash: Optional[str] = None):
+    """
+    Saves a DataFrame column by column in an .npz archive, with each column's dtype
+    so that read_frame restores the same frame. Numpy numeric, boolean and datetime
+    columns are stored as their own arrays, nullable extension columns as values plus
+    a null mask, text columns as fixed-width text plus a null mask, and object columns
+    holding other values as pickled object arrays. content_hash (frame_hash) is stored
+    for read_content_hash. The write is atomic.
+    """
+    arrays = {'columns': np.array([str(c) for c in df.columns]),
+              'dtypes': np.array([str(t) for t in df.dtypes]),
+              'index': df.index.to_numpy(),
+              'content_hash': np.array(content_hash or frame_hash(df))}
+    for i, column in enumerate(df.columns):
+        values = df[column]
+        missing = values.isna().to_numpy()
+        if isinstance(values.dtype, np.dtype) and values.dtype.kind in 'biufmM':
+            arrays[f'c{i}'] = values.to_numpy()
+        elif values.dtype.kind in 'biuf':
+            # Nullable extension column (Int64, Float64, boolean): its numpy values plus the mask.
+            arrays[f'c{i}'] = values.to_numpy(dtype=values.dtype.numpy_dtype, na_value=0)
+            arrays[f'm{i}'] = missing
+        elif values[~missing].map(type).eq(str).all():
+            arrays[f'c{i}'] = np.array(values.astype(object).where(~missing, '').to_numpy(), dtype=str)
+            arrays[f'm{i}'] = missing
+        else:
+            arrays[f'o{i}'] = values.to_numpy(dtype=object)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def read_frame(path: str) -> pd.DataFrame:
+    # Object columns are pickled; the archives are only ever written by write_frame.
+    with np.load(path, allow_pickle=True) as archive:
+        columns = archive['columns'].tolist()
+        dtypes = archive['dtypes'].tolist()
+        data = {}
+        for i, column in enumerate(columns):
+            if f'o{i}' in archive:
+                values = pd.Series(archive[f'o{i}'], dtype=object)
+            else:
+                values = pd.Series(archive[f'c{i}'])
+                if f'm{i}' in archive:
+                    values = values.astype(object).where(~archive[f'm{i}'], np.nan)
+            data[column] = values.astype(dtypes[i]) if str(values.dtype) != dtypes[i] else values
+        index = archive['index']
+    df = pd.DataFrame(data, columns=columns)
+    df.index = index
+    return df
+
+
+def read_content_hash(path: str) -> str:
+    """The frame_hash stored with a cached frame, read without loading the frame."""
+    with np.load(path, allow_pickle=False) as archive:
+        return str(archive['content_hash'])
+
+
+def drop_stale_stage_caches(cache_dir: str, name: str, keep: str):
+    """Removes older cached outputs of a stage, keeping only the file at keep."""
+    for entry in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, entry)
+        if entry.startswith(f"{name}-") and entry.endswith('.npz') and path != keep:
+            os.remove(path)
+
+
+def run_pipeline(registrar_path: str, cache_dir: str = PIPELINE_CACHE_DIR, sheet_name: str = 'Sheet1',
+                 header: int = 1, stages: Optional[List[Tuple[str, int, Callable]]] = None
+                 ) -> Tuple[pd.DataFrame, List[Dict[str, Any]]]:
+    """
+    Runs the registrar sheet through the stages in memory and returns the final
+    DataFrame with a per-stage report. Every stage output is cached in cache_dir with
+    its content hash, under a key made from the content hash of the stage's input (the
+    workbook's SHA-1 for the registrar read) and the stage's version. An edit that
+    leaves a stage's output unchanged therefore reuses every later stage. A cached
+    output is only read back when the next stage has to be recomputed, or when it is
+    the final one; other cache hits are 'skipped'.
+    """
+    stages = PIPELINE_STAGES if stages is None else stages
+    os.makedirs(cache_dir, exist_ok=True)
+    source = (lambda _: read_registrar(registrar_path, sheet_name, header))
+    steps = [('registrar', REGISTRAR_STAGE_VERSION, source)] + list(stages)
+
+    input_hash = f"{file_hash(registrar_path)}:{sheet_name}:{header}"
+    df, unread = None, None  # unread: (report entry, path) of a cached output not loaded yet
+    report = []
+    for name, version, stage in steps:
+        path = stage_cache_path(cache_dir, name, stage_key(input_hash, name, version))
+        if os.path.exists(path):
+            input_hash = read_content_hash(path)
+            report.append({'stage': name, 'version': version, 'status': 'skipped'})
+            unread = (report[-1], path)
+            continue
+        if unread is not None:
+            df = read_frame(unread[1])
+            unread[0].update(status='cached', rows=len(df))
+            unread = None
+        started = time.perf_counter()
+        df = stage(df)
+        input_hash = frame_hash(df)
+        write_frame(df, path, input_hash)
+        drop_stale_stage_caches(cache_dir, name, path)
+        report.append({'stage': name, 'version': version, 'status': 'computed', 'rows': len(df),
+                       'seconds': round(time.perf_counter() - started, 3)})
+    if unread is not None:
+        df = read_frame(unread[1])
+        unread[0].update(status='cached', rows=len(df))
+    return df, report
+
+
+def embed_contexts(df: pd.DataFrame, store_path: str, model_name: str = MODEL_NAME,
+                   model: Optional[SentenceTransformer] = None, **options) -> Dict[str, Any]:
+    """
+    Brings the embedding store in line with df['context']. When the store already holds
+    these exact contexts, in order, for the same model, nothing is loaded or written;
+    otherwise the store is rewritten incrementally (see generate_embedding_store).
+    """
+    texts = df['context'].astype(str).tolist()
+    previous = open_reusable_store(store_path, model_name)
+    if (previous is not None and previous.row_ids == df.index.tolist()
+            and previous.hashes == [context_hash(t) for t in texts]):
+        return {'stage': 'embed', 'status': 'cached', 'rows': len(texts)}
+    started = time.perf_counter()
+    model = model or SentenceTransformer(model_name)
+    stats = generate_embedding_store(texts, df.index.tolist(), model, store_path, model_name=model_name,
+                                     incremental=True, **options)
+    return {'stage': 'embed', 'status': 'computed', **stats, 'seconds': round(time.perf_counter() - started, 3)}
+
+
+def build_search_index(registrar_path: str, store_path: str, cache_dir: str = PIPELINE_CACHE_DIR,
+                       model_name: str = MODEL_NAME, quantization: Optional[str] = None,
+                       **embed_options) -> Tuple[ScheduleSearchIndex, List[Dict[str, Any]]]:
+    """Registrar sheet -> cleaned sessions with context -> embedding store -> search index."""
+    df, report = run_pipeline(registrar_path, cache_dir)
+    report.append(embed_contexts(df, store_path, model_name, **embed_options))
+    index = ScheduleSearchIndex.from_store(df, store_path, quantization=quantization)
+    return index, report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Registrar sheet -> cleaned schedule -> embeddings, "
+                                                 "with every stage cached.")
+    parser.add_argument("--registrar", default="Spring Schedule 2025(1).xlsx", help="Registrar workbook")
+    parser.add_argument("--sheet", default="Sheet1")
+    parser.add_argument("--cache-dir", default=PIPELINE_CACHE_DIR)
+    parser.add_argument("--store", default="Updated_Schedule_embeddings", help="Embedding store prefix")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--skip-embeddings", action="store_true", help="Stop after the context stage")
+    parser.add_argument("--export", default=None, help="Also write the final sheet to this Excel file")
+    args = parser.parse_args()
+
+    df, report = run_pipeline(args.registrar, args.cache_dir, args.sheet)
+    if not args.skip_embeddings:
+        report.append(embed_contexts(df, args.store, args.model))
+    if args.export:
+        df.to_excel(args.export, index=False)
+    for entry in report:
+        print(entry)
@@ -1,31 +1,198 @@
+import json
+import numpy as np
 import pandas as pd
-from sentence_transformers import SentenceTransformer, util
+from typing import List, Optional, Tuple
+from sentence_transformers import SentenceTransformer
+from ann_index import build_ann_index, load_ann_index, top_k_indices
+from embedding_store import open_embedding_store
+from query_cache import QueryEmbeddingCache
+from quantization import QuantizedVectors
 
-# Load the schedule with embeddings
-file_path = r"C:\Users\afnan baba\Desktop\MOOSA\mohib umair moosa project\Updated_Schedule_with_Embeddings.xlsx"
-df = pd.read_excel(file_path)
+DEFAULT_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
-# Load the same model used for generating embeddings
-model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+# Rows scored per block when the stored matrix is not float32 (e.g. a float16 store).
+SCORE_BLOCK_ROWS = 65536
 
-# Convert stored string embeddings back to lists
-import ast
-df['embeddings'] = df['embeddings'].apply(ast.literal_eval)
 
-# Get user query
-query = "Data Structures and Algorithms"
-query_embedding = model.encode(query, convert_to_tensor=True)
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalizes each row so that a dot product equals cosine similarity."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
 
-# Compute similarity scores
-embeddings = [model.encode(text, convert_to_tensor=True) for text in df['context']]
-similarities = [util.pytorch_cos_sim(query_embedding, emb)[0][0].item() for emb in embeddings]
 
-# Add similarity scores to DataFrame
-df['similarity'] = similarities
+def parse_embedding_column(values) -> np.ndarray:
+    """
+    Parses the stringified embedding lists stored in the Excel sheet into a
+    contiguous float32 matrix. This happens once per index load, not per query.
+    """
+    return np.ascontiguousarray([json.loads(v) for v in values], dtype=np.float32)
 
-# Sort results by similarity (highest first)
-df_sorted = df.sort_values(by='similarity', ascending=False)
 
-# Display top 5 matching results
-top_results = df_sorted[['context', 'similarity']].head(5)
-print("\nTop Matching Results:\n", top_results)
+class ScheduleSearchIndex:
+    """
+    Semantic search over the schedule rows.
+    The stored context embeddings are held as one normalized matrix (float32, or a
+    memory-mapped float16 store), so each query costs a single encode plus one matrix product.
+    """
+
+    def __init__(self, df: pd.DataFrame, embeddings: np.ndarray, model: Optional[SentenceTransformer] = None,
+                 normalized: bool = False, query_cache: Optional[QueryEmbeddingCache] = None):
+        if len(df) != len(embeddings):
+            raise ValueError(f"Row count mismatch: {len(df)} rows vs {len(embeddings)} embeddings")
+        self.df = df.reset_index(drop=True)
+        if normalized and embeddings.dtype in (np.float16, np.float32):
+            # Already unit-length (e.g. a memory-mapped store): keep it as-is, no copy.
+            self.embeddings = embeddings
+        else:
+            self.embeddings = normalize_rows(np.ascontiguousarray(embeddings, dtype=np.float32))
+        self.model = model
+        # Optional; when set, repeated queries skip the transformer.
+        self.query_cache = query_cache
+        # Optional approximate nearest-neighbour backend (see ann_index); exact scoring when None.
+        self.ann = None
+        # Optional quantized first pass; its top rescore_factor * k rows are rescored exactly.
+        self.quantized: Optional[QuantizedVectors] = None
+        self.rescore_factor = 4
+
+    def set_quantization(self, kind: Optional[str], rescore_factor: int = 4,
+                         quantized: Optional[QuantizedVectors] = None):
+        """
+        Scores queries against 'int8' or 'binary' codes first and rescores the best
+        rescore_factor * k candidates with the full-precision vectors. None disables it.
+        """
+        if kind is None:
+            self.quantized = None
+            return
+        self.quantized = quantized if quantized is not None else QuantizedVectors.from_matrix(kind, self.embeddings)
+        self.rescore_factor = rescore_factor
+
+    def build_ann(self, kind: str, **params):
+        """Builds an ANN backend ('ivf', 'ivfpq', 'hnsw', ...) over the row embeddings and uses it for search."""
+        self.ann = build_ann_index(kind, np.asarray(self.embeddings, dtype=np.float32), **params)
+        return self.ann
+
+    def load_ann(self, path: str):
+        """Loads a saved ANN backend built over these rows and uses it for search."""
+        self.ann = load_ann_index(path)
+        return self.ann
+
+    @classmethod
+    def from_excel(cls, file_path: str, model: Optional[SentenceTransformer] = None) -> "ScheduleSearchIndex":
+        """Loads a schedule sheet with an 'embeddings' column of stringified vectors."""
+        df = pd.read_excel(file_path)
+        if 'embeddings' not in df.columns:
+            raise ValueError("Error: 'embeddings' column not found in dataset!")
+        embeddings = parse_embedding_column(df['embeddings'])
+        return cls(df.drop(columns=['embeddings']), embeddings, model)
+
+    @classmethod
+    def from_store(cls, df: pd.DataFrame, store_path: str, model: Optional[SentenceTransformer] = None,
+                   quantization: Optional[str] = None, rescore_factor: int = 4) -> "ScheduleSearchIndex":
+        """
+        Builds the index from a schedule DataFrame and a binary embedding store.
+        The store's row ids select and order the DataFrame rows. With quantization
+        ('int8' or 'binary') the store's quantized copy is used for a first pass.
+        """
+        store = open_embedding_store(store_path)
+        index = cls(df.loc[store.row_ids], store.matrix, model, normalized=store.normalized)
+        if quantization is not None:
+            index.set_quantization(quantization, rescore_factor, store.quantized(quantization))
+        return index
+
+    def _get_model(self) -> SentenceTransformer:
+        if self.model is None:
+            self.model = SentenceTransformer(DEFAULT_MODEL_NAME)
+        return self.model
+
+    def _encode(self, queries: List[str]) -> np.ndarray:
+        vectors = self._get_model().encode(queries, convert_to_numpy=True, normalize_embeddings=True)
+        return np.asarray(vectors, dtype=np.float32).reshape(len(queries), -1)
+
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Encodes all queries in one batch into normalized float32 vectors.
+        With a query cache, only the queries not already cached are encoded.
+        """
+        if not queries:
+            return np.empty((0, self.embeddings.shape[1]), dtype=np.float32)
+        if self.query_cache is not None:
+            return self.query_cache.encode(queries, self._encode)
+        return self._encode(queries)
+
+    def score(self, query_vectors: np.ndarray) -> np.ndarray:
+        """Cosine scores of shape (Q, N) for normalized query vectors against every row."""
+        if self.embeddings.dtype == np.float32:
+            return query_vectors @ self.embeddings.T
+        # Upcast reduced-precision stores block by block to keep memory bounded.
+        n_rows = len(self.embeddings)
+        scores = np.empty((len(query_vectors), n_rows), dtype=np.float32)
+        for start in range(0, n_rows, SCORE_BLOCK_ROWS):
+            block = np.asarray(self.embeddings[start:start + SCORE_BLOCK_ROWS], dtype=np.float32)
+            scores[:, start:start + len(block)] = query_vectors @ block.T
+        return scores
+
+    def score_rows(self, query_vectors: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Cosine scores of shape (Q, len(rows)) against a subset of rows only."""
+        block = np.asarray(self.embeddings[rows], dtype=np.float32)
+        return np.atleast_2d(np.asarray(query_vectors, dtype=np.float32)) @ block.T
+
+    def search_vectors(self, query_vectors: np.ndarray, top_k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Scores a (Q, dim) matrix of normalized query vectors against every row,
+        or through the ANN backend when one is set.
+        Returns (indices, scores), each of shape (Q, k), best match first;
+        an ANN backend pads with index -1 when it finds fewer than k rows.
+        """
+        query_vectors = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+        if self.ann is not None:
+            return self.ann.search(query_vectors, top_k)
+        if self.quantized is not None:
+            return self._search_quantized(query_vectors, top_k)
+        scores = self.score(query_vectors)
+        indices = top_k_indices(scores, top_k)
+        return indices, np.take_along_axis(scores, indices, axis=1)
+
+    def _search_quantized(self, query_vectors: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        candidates = top_k_indices(self.quantized.score(query_vectors), top_k * self.rescore_factor)
+        all_indices, all_scores = [], []
+        for query_vector, rows in zip(query_vectors, candidates):
+            exact = self.score_rows(query_vector, rows)
+            best = top_k_indices(exact, top_k)
+            all_indices.append(rows[best[0]])
+            all_scores.append(exact[0, best[0]])
+        return np.stack(all_indices), np.stack(all_scores)
+
+    def search_many(self, queries: List[str], top_k: int = 5) -> List[pd.DataFrame]:
+        """Answers several queries with one batched encode and one matrix product."""
+        if not queries:
+            return []
+        indices, scores = self.search_vectors(self.encode_queries(queries), top_k)
+        results = []
+        for row_indices, row_scores in zip(indices, scores):
+            found = row_indices >= 0
+            row_indices, row_scores = row_indices[found], row_scores[found]
+            result = self.df.iloc[row_indices].copy()
+            result['similarity'] = row_scores
+            results.append(result)
+        return results
+
+    def search(self, query: str, top_k: int = 5) -> pd.DataFrame:
+        """Returns the top_k matching schedule rows for a query, with a 'similarity' column."""
+        return self.search_many([query], top_k)[0]
+
+
+if __name__ == "__main__":
+    # Load the schedule and the binary embedding store written by the generator
+    file_path = "Updated_Schedule.xlsx"
+    store_path = "Updated_Schedule_embeddings"
+    index = ScheduleSearchIndex.from_store(pd.read_excel(file_path), store_path)
+    index.query_cache = QueryEmbeddingCache(path="query_cache.npz")
+
+    # Get user query
+    query = "Data Structures and Algorithms"
+
+    # Display top 5 matching results
+    top_results = index.search(query, top_k=5)[['context', 'similarity']]
+    print("\nTop Matching Results:\n", top_results)
+    index.query_cache.save()
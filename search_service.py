@@ -0,0 +1,216 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+import pandas as pd
+from typing import Any, Dict, List, Optional, Tuple
+from search_schedule import ScheduleSearchIndex
+from query_cache import QueryEmbeddingCache
+
+
+class QueryBatcher:
+    """
+    Micro-batches concurrent queries.
+    Requests queue up while a batch is being encoded; the next batch takes everything
+    pending (up to max_batch_size), waiting at most max_wait_ms for more to arrive.
+    Each batch costs one encode and one matrix product, run off the event loop.
+    """
+
+    def __init__(self, index: ScheduleSearchIndex, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.index = index
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue: "asyncio.Queue[Tuple[str, int, asyncio.Future]]" = asyncio.Queue()
+        self.batches = 0
+        self.queries = 0
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+
+    async def search(self, query: str, top_k: int = 5) -> pd.DataFrame:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((query, top_k, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[str, int, asyncio.Future]]:
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            queries = [query for query, _, _ in batch]
+            top_k = max(k for _, k, _ in batch)
+            try:
+                results = await loop.run_in_executor(None, self.index.search_many, queries, top_k)
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.queries += len(batch)
+            for (_, k, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result.head(k))
+
+
+def request_query(request: Dict[str, Any]) -> Optional[str]:
+    """Takes the query text from 'query', falling back to 'body' or 'title' (requests.jsonl style)."""
+    for key in ('query', 'body', 'title'):
+        if request.get(key):
+            return str(request[key])
+    return None
+
+
+async def handle_line(batcher: QueryBatcher, line: str, default_top_k: int) -> Dict[str, Any]:
+    """
+    Answers one JSON-lines request and returns the response record. A request that
+    cannot be answered gets an error record, so every line receives a response.
+    """
+    started = time.perf_counter()
+
+    def failed(error: str, request_id: Any = None) -> Dict[str, Any]:
+        return {'request_id': request_id, 'error': error,
+                'latency_ms': round((time.perf_counter() - started) * 1000, 3)}
+
+    try:
+        request = json.loads(line)
+    except json.JSONDecodeError as e:
+        return failed(f'Invalid JSON: {e}')
+    if not isinstance(request, dict):
+        return failed('Request must be a JSON object')
+    request_id = request.get('request_id', request.get('id'))
+    query = request_query(request)
+    if query is None:
+        return failed("Missing 'query'", request_id)
+    try:
+        top_k = int(request.get('top_k', default_top_k))
+    except (TypeError, ValueError):
+        return failed(f"Invalid 'top_k': {request.get('top_k')!r}", request_id)
+    if top_k < 1:
+        return failed(f"Invalid 'top_k': {top_k}", request_id)
+    try:
+        result = await batcher.search(query, top_k)
+    except Exception as e:
+        return failed(f'Search failed: {e}', request_id)
+    return {
+        'request_id': request_id,
+        'query': query,
+        'results': result.to_dict(orient='records'),
+        'latency_ms': round((time.perf_counter() - started) * 1000, 3)
+    }
+
+
+async def serve_lines(batcher: QueryBatcher, readline, write, default_top_k: int):
+    """Reads requests line by line and answers them concurrently, writing responses as they finish."""
+    pending = set()
+
+    async def answer(line: str):
+        response = await handle_line(batcher, line, default_top_k)
+        await write(json.dumps(response, default=str) + "\n")
+
+    while True:
+        line = await readline()
+        if not line:
+            break
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line:
+            continue
+        task = asyncio.create_task(answer(line))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.gather(*pending)
+
+
+async def serve_stdin(batcher: QueryBatcher, default_top_k: int):
+    """Serves JSON-lines requests from stdin, e.g. `python search_service.py < requests.jsonl`."""
+    loop = asyncio.get_running_loop()
+
+    # Read in a thread: stdin may be a redirected regular file, which asyncio pipes reject.
+    async def readline():
+        return await loop.run_in_executor(None, sys.stdin.readline)
+
+    async def write(text: str):
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    await serve_lines(batcher, readline, write, default_top_k)
+
+
+async def serve_socket(batcher: QueryBatcher, host: str, port: int, default_top_k: int):
+    """Serves JSON-lines requests over a local TCP socket; each connection is handled concurrently."""
+    async def on_connect(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        lock = asyncio.Lock()
+
+        async def write(text: str):
+            async with lock:
+                writer.write(text.encode('utf-8'))
+                await writer.drain()
+
+        try:
+            await serve_lines(batcher, reader.readline, write, default_top_k)
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(on_connect, host, port)
+    print(f"Schedule search service listening on {host}:{port}", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+async def main(args: argparse.Namespace):
+    # Load the model and index once for the lifetime of the service.
+    index = ScheduleSearchIndex.from_store(pd.read_excel(args.schedule), args.store)
+    index.query_cache = QueryEmbeddingCache(max_size=args.query_cache_size, path=args.query_cache)
+    index._encode(["warm up"])
+    batcher = QueryBatcher(index, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+    batcher.start()
+    try:
+        if args.port is not None:
+            await serve_socket(batcher, args.host, args.port, args.top_k)
+        else:
+            await serve_stdin(batcher, args.top_k)
+    finally:
+        await batcher.stop()
+        if args.query_cache is not None:
+            index.query_cache.save()
+        print(f"Answered {batcher.queries} queries in {batcher.batches} batches; "
+              f"query cache: {index.query_cache.stats()}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Long-lived schedule search service (JSON lines).")
+    parser.add_argument("--schedule", default="Updated_Schedule.xlsx", help="Schedule sheet with a 'context' column")
+    parser.add_argument("--store", default="Updated_Schedule_embeddings", help="Embedding store path")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None, help="Serve on a local socket instead of stdin")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--query-cache", default=None, help="Persist the query embedding cache to this .npz file")
+    parser.add_argument("--query-cache-size", type=int, default=10000)
+    asyncio.run(main(parser.parse_args()))
@@ -1,83 +1,72 @@
+import numpy as np
 import pandas as pd
+from typing import Dict, List
 
-# Load the Excel file
-file_path = 'Spring Schedule 2025(1).xlsx'
-sheet_name = 'Sheet1'
+# Column holding the class timings (column A of the registrar sheet).
+TIME_COLUMN = 'Unnamed: 0'
 
-# Read the Excel file and inspect the columns
-df = pd.read_excel(file_path, sheet_name=sheet_name, header=[1])  # Assuming the second row is the header
+# Day pattern of each column group, keyed by the suffix pandas gives repeated headers
+# ('Course Name', 'Course Name.1', 'Course Name.2', ...). Add an entry to support a new group.
+DAY_PATTERNS: Dict[str, List[str]] = {
+    '': ['Monday', 'Wednesday'],
+    '.1': ['Tuesday', 'Thursday'],
+    '.2': ['Friday', 'Saturday'],
+}
 
-# Print the column names to verify
-print("Column Names:", df.columns.tolist())
+# Registrar column (without suffix) -> transformed column.
+FIELD_COLUMNS: Dict[str, str] = {
+    'Course Name': 'Course Name',
+    'Class & Program': 'Program',
+    ' UMS ClassNo.': 'Class Code',  # Note the leading space
+    'Teacher': 'Teacher',
+}
 
-# Initialize an empty list to store the transformed data
-transformed_data = []
+OUTPUT_COLUMNS = ['Course Name', 'Program', 'Class Code', 'Day', 'Time', 'Teacher']
 
-# Iterate through each row in the DataFrame
-for index, row in df.iterrows():
-    timings = row['Unnamed: 0']  # Time is in column A, which is labeled as 'Unnamed: 0'
-    
-    # Monday / Wednesday
-    if pd.notna(row['Course Name']):
-        transformed_data.append({
-            'Course Name': row['Course Name'],
-            'Program': row['Class & Program'],
-            'Class Code': row[' UMS ClassNo.'],  # Note the leading space
-            'Day': 'Monday',
-            'Time': timings,
-            'Teacher': row['Teacher']
-        })
-        transformed_data.append({
-            'Course Name': row['Course Name'],
-            'Program': row['Class & Program'],
-            'Class Code': row[' UMS ClassNo.'],  # Note the leading space
-            'Day': 'Wednesday',
-            'Time': timings,
-            'Teacher': row['Teacher']
-        })
-    
-    # Tuesday / Thursday
-    if pd.notna(row['Course Name.1']):
-        transformed_data.append({
-            'Course Name': row['Course Name.1'],
-            'Program': row['Class & Program.1'],
-            'Class Code': row[' UMS ClassNo..1'],  # Note the leading space
-            'Day': 'Tuesday',
-            'Time': timings,
-            'Teacher': row['Teacher.1']
-        })
-        transformed_data.append({
-            'Course Name': row['Course Name.1'],
-            'Program': row['Class & Program.1'],
-            'Class Code': row[' UMS ClassNo..1'],  # Note the leading space
-            'Day': 'Thursday',
-            'Time': timings,
-            'Teacher': row['Teacher.1']
-        })
-    
-    # Friday / Saturday
-    if pd.notna(row['Course Name.2']):
-        transformed_data.append({
-            'Course Name': row['Course Name.2'],
-            'Program': row['Class & Program.2'],
-            'Class Code': row[' UMS ClassNo..2'],  # Note the leading space
-            'Day': 'Friday',
-            'Time': timings,
-            'Teacher': row['Teacher.2']
-        })
-        transformed_data.append({
-            'Course Name': row['Course Name.2'],
-            'Program': row['Class & Program.2'],
-            'Class Code': row[' UMS ClassNo..2'],  # Note the leading space
-            'Day': 'Saturday',
-            'Time': timings,
-            'Teacher': row['Teacher.2']
-        })
 
-# Convert the list to a DataFrame
-transformed_df = pd.DataFrame(transformed_data)
+def transform_schedule(df: pd.DataFrame, day_patterns: Dict[str, List[str]] = DAY_PATTERNS,
+                       field_columns: Dict[str, str] = FIELD_COLUMNS,
+                       time_column: str = TIME_COLUMN) -> pd.DataFrame:
+    """
+    Reshapes the wide registrar sheet (one row per time slot, one column group per
+    day pattern) into one row per course session.
+    Each column group found in day_patterns contributes one session per day for every
+    row with a course name. Rows come out in sheet order, then group order, then day order.
+    """
+    frames = []
+    for group, (suffix, days) in enumerate(day_patterns.items()):
+        source = {f"{column}{suffix}": target for column, target in field_columns.items()}
+        missing = [column for column in source if column not in df.columns]
+        if missing:
+            raise ValueError(f"Column group '{suffix or '(no suffix)'}' is missing columns: {missing}")
+        rows = np.flatnonzero(df[f"Course Name{suffix}"].notna().to_numpy())
+        block = df.iloc[rows][[time_column, *source]].rename(columns={**source, time_column: 'Time'})
+        block['_row'] = rows
+        block['_group'] = group
+        for day_order, day in enumerate(days):
+            frames.append(block.assign(Day=day, _day=day_order))
+    if not frames:
+        return pd.DataFrame(columns=OUTPUT_COLUMNS)
+    transformed = pd.concat(frames, ignore_index=True)
+    transformed = transformed.sort_values(['_row', '_group', '_day'], kind='stable')
+    return transformed[OUTPUT_COLUMNS].reset_index(drop=True)
 
-# Save the transformed data to a new Excel file
-transformed_df.to_excel('Transformed_Schedule.xlsx', index=False)
 
-print("Data transformation complete. Saved to 'Transformed_Schedule.xlsx'")
\ No newline at end of file
+if __name__ == "__main__":
+    # Load the Excel file
+    file_path = 'Spring Schedule 2025(1).xlsx'
+    sheet_name = 'Sheet1'
+
+    # Read the Excel file and inspect the columns
+    df = pd.read_excel(file_path, sheet_name=sheet_name, header=[1])  # Assuming the second row is the header
+
+    # Print the column names to verify
+    print("Column Names:", df.columns.tolist())
+
+    # Reshape into one row per course session
+    transformed_df = transform_schedule(df)
+
+    # Save the transformed data to a new Excel file
+    transformed_df.to_excel('Transformed_Schedule.xlsx', index=False)
+
+    print("Data transformation complete. Saved to 'Transformed_Schedule.xlsx'")